@@ -0,0 +1,118 @@
+"""
+bench_startup.py – Startup-time benchmark for SKC Log Reader
+
+Measures, in fresh interpreters, how long the app's import path takes on a
+cold start, and how long a Streamlit rerun of the script body takes (run with
+Streamlit's AppTest harness). Fails if either exceeds its budget, or if any
+lazily loaded subsystem cannot be imported. Lazy subsystems are timed for reference.
+
+Usage:
+    python bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_SCRIPT = "skc_log_reader.py"
+# Modules skc_log_reader.py loads on every run: its eager imports, plus test_plan
+# (and through it analysis), which the Test Plan tab uses on every run
+EAGER_MODULES = ["modules.auth", "modules.history", "modules.views", "modules.workspace", "modules.jobs", "modules.lazy",
+                 "modules.test_plan", "modules.analysis"]
+# Modules skc_log_reader.py defers with lazy_import until first use (must import, not budgeted)
+LAZY_MODULES = ["modules.recommendations", "modules.ai_rca", "modules.pipeline", "modules.fingerprint",
+                "modules.timeseries", "modules.report"]
+
+COLD_BUDGET_MS = 150
+RERUN_BUDGET_MS = 100
+
+_IMPORT_CHILD = """
+import importlib, json, sys, time
+names = json.loads(sys.argv[1])
+start = time.perf_counter()
+error = None
+try:
+    for name in names:
+        importlib.import_module(name)
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+print(json.dumps({"ms": (time.perf_counter() - start) * 1000, "error": error}))
+"""
+
+# Runs the script body twice, as a Streamlit session does: the first run pays the
+# imports, the second is a plain rerun with every module already loaded
+_SCRIPT_CHILD = """
+import json, sys, time
+try:
+    from streamlit.testing.v1 import AppTest
+except Exception as e:
+    print(json.dumps({"ms": 0.0, "error": f"Streamlit AppTest unavailable ({type(e).__name__}: {e})"}))
+    sys.exit()
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+app.run()
+start = time.perf_counter()
+app.run()
+rerun = (time.perf_counter() - start) * 1000
+errors = [e.message for e in app.exception]
+print(json.dumps({"ms": rerun, "error": "; ".join(errors) or None}))
+"""
+
+
+def measure(child: str, arg: str, runs: int) -> dict:
+    """
+    Median time reported by a benchmark child, each run in a fresh interpreter.
+    """
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", child, arg],
+            cwd=Path(__file__).parent, capture_output=True, text=True
+        )
+        lines = out.stdout.strip().splitlines()
+        results.append(json.loads(lines[-1]) if lines else {"ms": 0.0, "error": out.stderr.strip()[-300:] or "no output"})
+    return {
+        "ms": statistics.median(r["ms"] for r in results),
+        "error": next((r["error"] for r in results if r["error"]), None),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SKC Log Reader startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    cold = measure(_IMPORT_CHILD, json.dumps(EAGER_MODULES), args.runs)
+    print(f"Import path (cold): {cold['ms']:.1f} ms (budget {COLD_BUDGET_MS} ms)")
+    if cold["error"]:
+        failures.append(f"import path: {cold['error']}")
+    elif cold["ms"] > COLD_BUDGET_MS:
+        failures.append("cold import path over budget")
+
+    rerun = measure(_SCRIPT_CHILD, APP_SCRIPT, args.runs)
+    timing = "unavailable" if rerun["error"] else f"{rerun['ms']:.1f} ms"
+    print(f"Script rerun: {timing} (budget {RERUN_BUDGET_MS} ms)")
+    if rerun["error"]:
+        failures.append(f"script rerun: {rerun['error']}")
+    elif rerun["ms"] > RERUN_BUDGET_MS:
+        failures.append("script rerun over budget")
+
+    print("Lazy subsystems (loaded on first use):")
+    for name in LAZY_MODULES:
+        lazy = measure(_IMPORT_CHILD, json.dumps([name]), 1)
+        status = "unavailable" if lazy["error"] else f"{lazy['ms']:.1f} ms"
+        print(f"  {name:<28} {status}")
+        if lazy["error"]:
+            failures.append(f"{name}: {lazy['error']}")
+
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    print("✅ Within startup budget" if not failures else "❌ Startup benchmark failed")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,17 +5,26 @@ Prepares prompts and fetches AI-generated root cause analysis.
 """
 
 import os
-import openai
+from functools import lru_cache
 from typing import List, Dict, Optional
 
-# Get API key from environment or Streamlit secrets
-openai.api_key = os.getenv("OPENAI_API_KEY")
-try:
-    import streamlit as st
-    if not openai.api_key and st.secrets.get("general"):
-        openai.api_key = st.secrets["general"].get("OPENAI_API_KEY")
-except Exception:
-    pass
+
+@lru_cache(maxsize=1)
+def _client():
+    """
+    Imports openai and resolves the API key on first use, from the environment
+    or Streamlit secrets, instead of at module import time.
+    """
+    import openai
+
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    try:
+        import streamlit as st
+        if not openai.api_key and st.secrets.get("general"):
+            openai.api_key = st.secrets["general"].get("OPENAI_API_KEY")
+    except Exception:
+        pass
+    return openai
 
 
 def prepare_prompt(errors: List[str], metadata: Dict) -> str:
@@ -48,6 +57,7 @@ def fetch_gpt_rca(prompt: str, model: str = "gpt-4") -> Optional[str]:
     """
     Sends the prompt to GPT and returns the result.
     """
+    openai = _client()
     if not openai.api_key:
         return "❌ Missing OpenAI API key. Please set it in your environment or secrets."
 
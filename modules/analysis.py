@@ -8,10 +8,13 @@ import re
 import json
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
 
+from modules.line_cache import mask_line
 
-@dataclass
+
+@dataclass(frozen=True)
 class LogEvent:
     timestamp: Optional[datetime]
     raw: str
@@ -19,6 +22,8 @@ class LogEvent:
     category: str
     severity: int
     correlation_id: Optional[str]
+    # Windows event ID, for events read from .evtx logs
+    event_id: Optional[int] = None
 
 
 # Known error patterns and mappings
@@ -38,95 +43,211 @@ SIGNATURES = {
 }
 
 
+TS_PATTERN = r"(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})"
+LEVEL_PATTERN = r"\b(INFO|DEBUG|WARNING|ERROR|CRITICAL)\b"
+CORR_PATTERN = r"correlation[id]?[:=]\s*([A-Za-z0-9\-]+)"
+
+
+@lru_cache(maxsize=None)
+def compiled_rules() -> Tuple[re.Pattern, re.Pattern, re.Pattern]:
+    """
+    Timestamp, level and correlation-ID regexes, compiled on first use and kept
+    for the life of the process (so Streamlit reruns reuse them)
+    """
+    return (
+        re.compile(TS_PATTERN),
+        re.compile(LEVEL_PATTERN, re.IGNORECASE),
+        re.compile(CORR_PATTERN, re.IGNORECASE),
+    )
+
+# Variable parts of a line, masked to build a message template (most specific first)
+TEMPLATE_MASKS = [
+    (r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?", "<TS>"),
+    (r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b", "<GUID>"),
+    (r"\b0x[0-9a-fA-F]+\b", "<HEX>"),
+    (r"\d+", "<NUM>"),
+]
+
+
+@lru_cache(maxsize=None)
+def compiled_template_masks() -> List[Tuple[re.Pattern, str]]:
+    return [(re.compile(pattern), token) for pattern, token in TEMPLATE_MASKS]
+
+
+def line_template(line: str) -> str:
+    """
+    Reduce a log line to its message template by masking timestamps, GUIDs, hex codes and numbers
+    """
+    template = line.strip()
+    for pattern, token in compiled_template_masks():
+        template = pattern.sub(token, template)
+    return template
+
+
+def iter_clusters(events: Iterable[LogEvent], window_s: int = 5) -> Iterator[Dict]:
+    """
+    Group a time-ordered stream of events into clusters, one cluster at a time.
+    Works directly on the generator returned by timeline.build_timeline.
+    """
+    current = []
+    prev = None
+    for event in events:
+        delta = (event.timestamp - prev.timestamp).total_seconds() if \
+            (prev and event.timestamp and prev.timestamp) else 0
+        if current and delta > window_s:
+            yield _cluster_dict(current)
+            current = []
+        current.append(event)
+        prev = event
+    if current:
+        yield _cluster_dict(current)
+
+
+def _cluster_dict(cluster: List[LogEvent]) -> Dict:
+    return {
+        "category": cluster[0].category,
+        "count": len(cluster),
+        "sample": cluster[0].raw,
+        "timestamps": [e.timestamp for e in cluster if e.timestamp]
+    }
+
+
+def iter_gaps(events: Iterable[LogEvent], max_gap_s: int = 300) -> Iterator[str]:
+    """
+    Yield an anomaly message for every gap larger than max_gap_s between consecutive timestamps
+    """
+    prev_ts = None
+    for event in events:
+        if not event.timestamp:
+            continue
+        message = gap_anomaly(prev_ts, event.timestamp, max_gap_s) if prev_ts else None
+        if message:
+            yield message
+        prev_ts = event.timestamp
+
+
+def gap_anomaly(prev_ts: datetime, ts: datetime, max_gap_s: int = 300) -> Optional[str]:
+    """
+    Anomaly message for the gap between two consecutive timestamps, or None if it is small enough
+    """
+    gap = (ts - prev_ts).total_seconds()
+    if gap > max_gap_s:
+        return f"⚠️ Large time gap: {int(gap)}s between {prev_ts} and {ts}"
+    return None
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(text: str, fmt: Optional[str] = None) -> datetime:
+    """
+    Parse a timestamp in the given strptime format, or as "YYYY-MM-DD HH:MM:SS"
+    (space or "T" separated) if none is given. Shared by all line parsers (see parsers.py);
+    neighbouring lines usually share a timestamp, so parsed values are memoized.
+    """
+    if fmt:
+        return datetime.strptime(text, fmt)
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return datetime.strptime(text, "%Y-%m-%dT%H:%M:%S")
+
+
+def classify_line(line: str) -> Tuple[Optional[str], str, int]:
+    """
+    Level, category and severity of a line
+    """
+    level_match = compiled_rules()[1].search(line)
+    level = level_match.group(1).upper() if level_match else None
+
+    # Identify category and severity
+    category = "Other"
+    severity = 1
+    lowered = line.lower()
+    for keyword, (cat, sev) in SIGNATURES.items():
+        if keyword in lowered:
+            category, severity = cat, sev
+            break
+    return level, category, severity
+
+
 class LogAnalyzer:
-    def __init__(self):
-        self.events: List[LogEvent] = []
+    def __init__(self, events: Optional[List[LogEvent]] = None, ordered: bool = False, cache=None):
+        self.events: List[LogEvent] = events if events is not None else []
+        # True once events are known to be in timeline order (see parse_timeline)
+        self.ordered = ordered
+        # Optional line_cache.LineCache to reuse classification of repeated lines
+        self.cache = cache
 
-    def parse_logs(self, lines: List[str]) -> List[LogEvent]:
+    def parse_line(self, line: str) -> LogEvent:
         """
-        Parse list of log lines into LogEvent objects
+        Parse a single log line into a LogEvent.
+        With a cache, lines that differ only in digits reuse level, category and severity.
+        Masking keeps every character position, and the timestamp/correlation patterns
+        only test digit-ness, so their match spans are cached too and simply sliced out.
         """
-        ts_re = re.compile(r"(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})")
-        level_re = re.compile(r"\b(INFO|DEBUG|WARNING|ERROR|CRITICAL)\b", re.IGNORECASE)
-        corr_re = re.compile(r"correlation[id]?[:=]\s*([A-Za-z0-9\-]+)", re.IGNORECASE)
+        cached = None
+        if self.cache is not None:
+            key = mask_line(line)
+            cached = self.cache.get(key)
 
+        if cached:
+            level, category, severity, ts_span, corr_span = cached
+        else:
+            ts_re, _, corr_re = compiled_rules()
+            match = ts_re.search(line)
+            corr_match = corr_re.search(line)
+            ts_span = match.span(1) if match else None
+            corr_span = corr_match.span(1) if corr_match else None
+            level, category, severity = classify_line(line)
+            if self.cache is not None:
+                self.cache.put(key, (level, category, severity, ts_span, corr_span))
+
+        ts = parse_timestamp(line[ts_span[0]:ts_span[1]]) if ts_span else None
+        correlation_id = line[corr_span[0]:corr_span[1]] if corr_span else None
+        return LogEvent(ts, line.strip(), level, category, severity, correlation_id)
+
+    def parse_logs(self, lines: List[str]) -> List[LogEvent]:
+        """
+        Parse list of log lines into LogEvent objects, with the parser for their sniffed format
+        """
+        parse, lines = self.parser_for(None, lines)
         for line in lines:
             try:
-                ts = None
-                match = ts_re.search(line)
-                if match:
-                    try:
-                        ts = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
-                    except:
-                        ts = datetime.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S")
-                level_match = level_re.search(line)
-                level = level_match.group(1).upper() if level_match else None
-                corr_match = corr_re.search(line)
-                correlation_id = corr_match.group(1) if corr_match else None
-
-                # Identify category and severity
-                category = "Other"
-                severity = 1
-                for keyword, (cat, sev) in SIGNATURES.items():
-                    if keyword in line.lower():
-                        category, severity = cat, sev
-                        break
-
-                self.events.append(LogEvent(ts, line.strip(), level, category, severity, correlation_id))
+                self.events.append(parse(line))
             except Exception as e:
                 continue
         return self.events
 
-    def cluster_events(self, window_s: int = 5) -> List[Dict]:
+    def parser_for(self, filename: Optional[str], lines: Iterable[str]):
         """
-        Group log events into time-based clusters
+        Line parser for a file's sniffed format (see parsers.py), and the lines to feed it
         """
-        if not self.events:
-            return []
+        from modules import parsers
 
-        sorted_events = sorted(self.events, key=lambda x: x.timestamp or datetime.min)
-        clusters = []
-        current = [sorted_events[0]]
-        for i in range(1, len(sorted_events)):
-            delta = (sorted_events[i].timestamp - sorted_events[i - 1].timestamp).total_seconds() if \
-                (sorted_events[i].timestamp and sorted_events[i - 1].timestamp) else 0
-            if delta <= window_s:
-                current.append(sorted_events[i])
-            else:
-                clusters.append(current)
-                current = [sorted_events[i]]
-        clusters.append(current)
-        return [
-            {
-                "category": cluster[0].category,
-                "count": len(cluster),
-                "sample": cluster[0].raw,
-                "timestamps": [e.timestamp for e in cluster if e.timestamp]
-            }
-            for cluster in clusters
-        ]
+        head, lines = parsers.peek(lines)
+        return parsers.parser_for(filename, head, self)[1], lines
 
-    def detect_anomalies(self) -> List[str]:
+    def parse_timeline(self, files: Iterable[Tuple[str, Iterable[str]]], buffer_size: int = 256) -> List[LogEvent]:
         """
-        Naive anomaly detection based on gaps, excessive severity, or out-of-order timestamps
+        Parse (filename, lines) pairs into a single time-ordered event list.
+        Each file is treated as a mostly sorted stream and merged with a k-way merge.
         """
-        outliers = []
-        timestamps = [e.timestamp for e in self.events if e.timestamp]
-        if not timestamps:
-            return []
+        from modules.timeline import build_timeline
 
-        # Check timestamp gaps
-        for i in range(1, len(timestamps)):
-            gap = (timestamps[i] - timestamps[i - 1]).total_seconds()
-            if gap > 300:
-                outliers.append(f"⚠️ Large time gap: {int(gap)}s between {timestamps[i-1]} and {timestamps[i]}")
+        self.events.extend(build_timeline(files, self.parse_line, buffer_size=buffer_size, parser_for=self.parser_for))
+        self.ordered = True
+        return self.events
 
-        # Count high severity
-        high = [e for e in self.events if e.severity >= 4]
-        if len(high) > len(self.events) * 0.4:
-            outliers.append("⚠️ High proportion of critical errors detected.")
+    def cluster_events(self, window_s: int = 5) -> List[Dict]:
+        """
+        Group log events into time-based clusters
+        """
+        return list(iter_clusters(self._timeline(), window_s))
 
-        return outliers
+    def detect_anomalies(self) -> List[str]:
+        """
+        Naive anomaly detection based on gaps (in timeline order) or excessive severity
+        """
+        return self._anomalies(self._timeline())
 
     def summary(self) -> Dict:
         """
@@ -136,13 +257,41 @@ class LogAnalyzer:
         for e in self.events:
             category_counts[e.category] = category_counts.get(e.category, 0) + 1
 
+        # Clusters and gaps are both taken in timeline order, sorted once
+        events = self._timeline()
         return {
             "total_events": len(self.events),
             "categories": category_counts,
-            "clusters": self.cluster_events(),
-            "anomalies": self.detect_anomalies()
+            "clusters": list(iter_clusters(events)),
+            "anomalies": self._anomalies(events)
         }
 
+    def partial_summary(self, window_s: int = 5, max_gap_s: int = 300):
+        """
+        Mergeable, serializable summary of these events (see partial_summary.py)
+        """
+        from modules.partial_summary import PartialSummary
+        return PartialSummary.from_events(self._timeline(), window_s=window_s, max_gap_s=max_gap_s)
+
+    def _timeline(self) -> List[LogEvent]:
+        # Timeline-ordered events are already sorted, skip the global sort
+        return self.events if self.ordered else sorted(self.events, key=lambda x: x.timestamp or datetime.min)
+
+    def _anomalies(self, events: List[LogEvent]) -> List[str]:
+        outliers = []
+        if not any(e.timestamp for e in events):
+            return []
+
+        # Check timestamp gaps
+        outliers.extend(iter_gaps(events))
+
+        # Count high severity
+        high = [e for e in events if e.severity >= 4]
+        if len(high) > len(events) * 0.4:
+            outliers.append("⚠️ High proportion of critical errors detected.")
+
+        return outliers
+
     def export_json(self, filepath: str) -> None:
         """
         Export summary to JSON file
@@ -0,0 +1,219 @@
+"""
+dataset_store.py – Shared read-only datasets for SKC Log Reader
+
+Streamlit serves every browser session from threads of one server process.
+When several analysts open the same bundle, its parsed results are identical,
+so they are kept once per process, keyed by a hash of the bundle's content
+(plus the settings that change the result, such as redaction keywords):
+- Raw ingested lines are written once to a memory-mapped temporary file, so
+  they live in the OS page cache instead of the Python heap
+- Shared data is deep-frozen (see freeze): dicts become FrozenDict, lists become
+  tuples and events are frozen dataclasses, so no session can change another's data
+- Sessions hold reference-counted handles. A dataset stays cached while any
+  handle is alive; idle datasets are evicted least-recently-used first
+Memory on a shared server therefore grows with unique bundles, not with users.
+"""
+
+import copy
+import hashlib
+import json
+import mmap
+import tempfile
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+MAX_IDLE_DATASETS = 4
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def dataset_key(input_path: str, **params) -> str:
+    """
+    SHA-256 of a file's (or a directory's files') content, plus any parameters
+    that change the parsed result.
+    """
+    path = Path(input_path)
+    digest = hashlib.sha256()
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        digest.update(str(file.relative_to(path) if path.is_dir() else file.name).encode() + b"\0")
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(block)
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict. Still a dict, so it serializes to JSON and renders in Streamlit
+    like one; copy.deepcopy returns an ordinary, modifiable dict.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Shared dataset values are read-only; copy them before modifying")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __deepcopy__(self, memo) -> Dict:
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+def freeze(value: Any) -> Any:
+    """
+    Deep read-only copy of a value for sharing between sessions: dicts become
+    FrozenDict and lists/tuples become tuples, recursively. Objects with a
+    freeze() method (e.g. timeseries.TimeHistogram) freeze themselves; other
+    values, such as frozen LogEvents and MappedLines, are shared as they are.
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if hasattr(value, "freeze"):
+        return value.freeze()
+    return value
+
+
+def _close_mapping(mapping: Optional[mmap.mmap], file) -> None:
+    if mapping is not None:
+        mapping.close()
+    file.close()
+
+
+class MappedLines(Sequence):
+    """
+    Read-only sequence of text lines backed by a memory-mapped temporary file.
+    Only an 8-byte offset per line stays in memory; lines are decoded on access.
+    The file is removed when the last reference to the sequence goes away.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array("Q", [0])
+        end = 0
+        for line in lines:
+            data = line.encode("utf-8", "surrogateescape")
+            self._file.write(data)
+            end += len(data)
+            self._offsets.append(end)
+        self._file.flush()
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if end else None
+        weakref.finalize(self, _close_mapping, self._map, self._file)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self._map[self._offsets[index]:self._offsets[index + 1]].decode("utf-8", "surrogateescape")
+
+    @property
+    def nbytes(self) -> int:
+        return self._offsets[-1]
+
+
+class DatasetHandle:
+    """
+    A session's reference to a shared dataset. Dropping the handle (or calling
+    release()) returns the reference to the store.
+    """
+
+    def __init__(self, store: "DatasetStore", key: str, data: Dict):
+        self.key = key
+        self._data = data
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    @property
+    def data(self) -> Dict:
+        # A new top-level dict, so sessions can replace keys without touching the shared one
+        return dict(self._data)
+
+    def release(self) -> None:
+        self._finalizer()
+
+
+class DatasetStore:
+    def __init__(self, max_idle: int = MAX_IDLE_DATASETS):
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._refs: Dict[str, int] = {}
+
+    def acquire(self, key: str) -> Optional[DatasetHandle]:
+        """
+        Handle to a cached dataset, or None if the key is unknown.
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                return None
+            self._entries.move_to_end(key)
+            self._refs[key] += 1
+        return DatasetHandle(self, key, data)
+
+    def put(self, key: str, data: Dict) -> DatasetHandle:
+        """
+        Stores a deep-frozen copy of a dataset (see freeze) and returns a handle.
+        If another session stored the same key first, its copy is shared instead.
+        """
+        data = freeze(data)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._refs[key] = 0
+            self._entries.move_to_end(key)
+            self._refs[key] += 1
+            data = self._entries[key]
+            self._evict()
+        return DatasetHandle(self, key, data)
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            if key in self._refs:
+                self._refs[key] -= 1
+                self._evict()
+
+    def _evict(self) -> None:
+        # Called with the lock held; entries are in least-recently-used order
+        idle = [key for key in self._entries if self._refs[key] == 0]
+        for key in idle[:max(0, len(idle) - self.max_idle)]:
+            del self._entries[key]
+            del self._refs[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "in_use": sum(1 for n in self._refs.values() if n),
+                "handles": sum(self._refs.values()),
+            }
+
+
+_store: Optional[DatasetStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> DatasetStore:
+    """
+    Process-wide dataset store shared by all Streamlit sessions.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DatasetStore()
+        return _store
@@ -1,7 +1,4 @@
-# Create a new error_codes.py module with known error codes and their meanings
-from pathlib import Path
-
-error_code_dict = '''"""
+"""
 error_codes.py – Maps known Windows HRESULTs, WU_E errors, and MSI codes to explanations and suggested actions.
 """
 
@@ -43,11 +40,3 @@ ERROR_CODES = {
         "fix": "Temporarily disable antivirus or reboot and try again."
     }
 }
-'''
-
-# Save to file
-error_code_file = Path("/mnt/data/skc_log_reader/modules/error_codes.py")
-error_code_file.parent.mkdir(parents=True, exist_ok=True)
-error_code_file.write_text(error_code_dict)
-
-error_code_file.name
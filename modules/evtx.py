@@ -0,0 +1,456 @@
+"""
+evtx.py – Native Windows Event Log (.evtx) reader for SKC Log Reader
+
+Pure-Python parser for the EVTX format, so System.evtx and Application.evtx
+from a bundle can be analyzed on any OS without Windows APIs or extra packages.
+
+File layout: a 4 KB file header ("ElfFile"), then 64 KB chunks ("ElfChnk").
+Every chunk is self-contained: a 512-byte header with string and template
+tables, then event records. Each record holds its event as Binary XML (BinXML):
+a template (shared by all events of the same shape, defined once per chunk)
+plus an array of substitution values.
+
+Chunks are independent, so they are parsed in worker processes and streamed
+back in record order. Records are rendered as one text line each
+("2024-01-01 12:00:00 ERROR [Provider] EventID=7031 ...") so they flow through
+redaction and parsing like any other log line.
+"""
+
+import multiprocessing
+import os
+import struct
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+FILE_MAGIC = b"ElfFile\x00"
+CHUNK_MAGIC = b"ElfChnk\x00"
+RECORD_MAGIC = b"\x2a\x2a\x00\x00"
+CHUNK_SIZE = 65536
+CHUNK_HEADER_SIZE = 512
+# Below this many chunks, worker start-up costs more than it saves
+PARALLEL_MIN_CHUNKS = 8
+
+# System/Level values (0 is "LogAlways")
+LEVELS = {0: "INFO", 1: "CRITICAL", 2: "ERROR", 3: "WARNING", 4: "INFO", 5: "DEBUG"}
+
+_FILETIME_EPOCH = datetime(1601, 1, 1)
+
+# BinXML tokens (the 0x40 bit is a "has more" flag and is masked off)
+_EOF, _OPEN, _CLOSE_START, _CLOSE_EMPTY, _END = 0x00, 0x01, 0x02, 0x03, 0x04
+_VALUE, _ATTRIBUTE, _CDATA, _CHARREF, _ENTITYREF = 0x05, 0x06, 0x07, 0x08, 0x09
+_PI_TARGET, _PI_DATA, _TEMPLATE, _SUB, _OPT_SUB, _FRAGMENT = 0x0A, 0x0B, 0x0C, 0x0D, 0x0E, 0x0F
+_VALUE_TOKENS = (_VALUE, _CDATA, _CHARREF, _ENTITYREF, _SUB, _OPT_SUB)
+
+# Fixed-size substitution value types: type -> struct format
+_FIXED = {
+    0x03: "<b", 0x04: "<B", 0x05: "<h", 0x06: "<H", 0x07: "<i", 0x08: "<I",
+    0x09: "<q", 0x0A: "<Q", 0x0B: "<f", 0x0C: "<d",
+}
+_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+
+@dataclass
+class EvtxRecord:
+    record_id: int
+    timestamp: datetime
+    event_id: Optional[int]
+    level: str
+    provider: str
+    channel: str = ""
+    computer: str = ""
+    activity_id: Optional[str] = None
+    # EventData/UserData values as (name, value); name is None for unnamed <Data>
+    data: List[Tuple[Optional[str], str]] = field(default_factory=list)
+
+
+class _Sub:
+    """
+    Substitution placeholder inside a parsed template.
+    """
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+class _Element:
+    __slots__ = ("name", "attrs", "children")
+
+    def __init__(self, name: str, attrs: Dict, children: List):
+        self.name = name
+        self.attrs = attrs
+        self.children = children
+
+    def child(self, name: str) -> Optional["_Element"]:
+        for node in self.children:
+            if isinstance(node, _Element) and node.name == name:
+                return node
+        return None
+
+    def elements(self) -> List["_Element"]:
+        return [node for node in self.children if isinstance(node, _Element)]
+
+    def text(self) -> str:
+        return "".join(_text(node) for node in self.children if not isinstance(node, _Element)).strip()
+
+
+def _text(value) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+def filetime(value: int) -> datetime:
+    """
+    Converts a Windows FILETIME (100 ns ticks since 1601-01-01 UTC) to a naive UTC datetime.
+    """
+    return _FILETIME_EPOCH + timedelta(microseconds=value // 10)
+
+
+class _Chunk:
+    """
+    BinXML decoder for one chunk. Names and parsed templates are cached per chunk,
+    because their offsets are only meaningful inside it.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.names: Dict[int, Tuple[str, int]] = {}
+        self.templates: Dict[int, List] = {}
+
+    def _name(self, pos: int) -> Tuple[str, int]:
+        """
+        Reads a name reference at pos. Names are stored once per chunk and referenced
+        by offset; the first use stores the name inline, right after the reference.
+        """
+        offset = struct.unpack_from("<I", self.data, pos)[0]
+        pos += 4
+        cached = self.names.get(offset)
+        if cached is None:
+            length = struct.unpack_from("<H", self.data, offset + 6)[0]
+            name = self.data[offset + 8:offset + 8 + 2 * length].decode("utf-16-le", "replace")
+            cached = self.names[offset] = (name, 8 + 2 * length + 2)
+        if offset == pos:
+            pos += cached[1]
+        return cached[0], pos
+
+    def content(self, pos: int) -> Tuple[List, int]:
+        """
+        Parses nodes until the end of the enclosing element (or of the fragment).
+        """
+        data = self.data
+        nodes = []
+        while True:
+            token = data[pos] & 0x0F
+            if token in (_EOF, _END):
+                return nodes, pos + 1
+            if token == _FRAGMENT:
+                pos += 4
+            elif token == _OPEN:
+                element, pos = self._element(pos)
+                nodes.append(element)
+            elif token == _TEMPLATE:
+                resolved, pos = self._template_instance(pos)
+                nodes.extend(resolved)
+            elif token in _VALUE_TOKENS:
+                values, pos = self._value(pos)
+                nodes.extend(values)
+            elif token == _PI_TARGET:
+                _, pos = self._name(pos + 1)
+            elif token == _PI_DATA:
+                pos += 3 + 2 * struct.unpack_from("<H", data, pos + 1)[0]
+            else:
+                raise ValueError(f"Unexpected BinXML token 0x{data[pos]:02x} at offset {pos}")
+
+    def _element(self, pos: int) -> Tuple[_Element, int]:
+        data = self.data
+        has_attributes = data[pos] & 0x40
+        # token, dependency id (2), element size (4)
+        name, pos = self._name(pos + 7)
+        attrs = {}
+        if has_attributes:
+            pos += 4  # attribute list size
+            while data[pos] & 0x0F == _ATTRIBUTE:
+                attr_name, pos = self._name(pos + 1)
+                parts = []
+                while data[pos] & 0x0F in _VALUE_TOKENS:
+                    values, pos = self._value(pos)
+                    parts.extend(values)
+                attrs[attr_name] = parts
+        token = data[pos] & 0x0F
+        pos += 1
+        if token == _CLOSE_EMPTY:
+            return _Element(name, attrs, []), pos
+        if token != _CLOSE_START:
+            raise ValueError(f"Unterminated start element <{name}> at offset {pos - 1}")
+        children, pos = self.content(pos)
+        return _Element(name, attrs, children), pos
+
+    def _value(self, pos: int) -> Tuple[List, int]:
+        data = self.data
+        token = data[pos] & 0x0F
+        if token == _VALUE:
+            value_type = data[pos + 1]
+            if value_type != 0x01:
+                raise ValueError(f"Unsupported inline value type 0x{value_type:02x}")
+            length = struct.unpack_from("<H", data, pos + 2)[0]
+            end = pos + 4 + 2 * length
+            return [data[pos + 4:end].decode("utf-16-le", "replace")], end
+        if token == _CDATA:
+            length = struct.unpack_from("<H", data, pos + 1)[0]
+            end = pos + 3 + 2 * length
+            return [data[pos + 3:end].decode("utf-16-le", "replace")], end
+        if token == _CHARREF:
+            return [chr(struct.unpack_from("<H", data, pos + 1)[0])], pos + 3
+        if token == _ENTITYREF:
+            name, pos = self._name(pos + 1)
+            return [_ENTITIES.get(name, f"&{name};")], pos
+        # Normal or optional substitution: index (2), value type (1)
+        return [_Sub(struct.unpack_from("<H", data, pos + 1)[0])], pos + 4
+
+    def _template_instance(self, pos: int) -> Tuple[List, int]:
+        data = self.data
+        # token, unknown (1), template id (4), definition offset (4)
+        definition = struct.unpack_from("<I", data, pos + 6)[0]
+        pos += 10
+        if definition == pos:
+            # Defined inline: next offset (4), GUID (16), data size (4), then the body
+            pos += 24 + struct.unpack_from("<I", data, pos + 20)[0]
+        template = self.templates.get(definition)
+        if template is None:
+            template, _ = self.content(definition + 24)
+            self.templates[definition] = template
+
+        count = struct.unpack_from("<I", data, pos)[0]
+        pos += 4
+        descriptors = [struct.unpack_from("<HBx", data, pos + 4 * i) for i in range(count)]
+        pos += 4 * count
+        values = []
+        for size, value_type in descriptors:
+            values.append(self._decode(pos, size, value_type))
+            pos += size
+        return _resolve(template, values), pos
+
+    def _decode(self, pos: int, size: int, value_type: int):
+        raw = self.data[pos:pos + size]
+        if value_type == 0x00 or not size:
+            return None
+        if value_type == 0x01:
+            return raw.decode("utf-16-le", "replace").rstrip("\x00")
+        if value_type == 0x02:
+            return raw.decode("latin-1").rstrip("\x00")
+        if value_type in _FIXED:
+            return struct.unpack_from(_FIXED[value_type], raw)[0]
+        if value_type == 0x0D:
+            return bool(struct.unpack_from("<I", raw)[0])
+        if value_type == 0x0F:
+            return "{" + str(uuid.UUID(bytes_le=raw)).upper() + "}"
+        if value_type in (0x10, 0x14, 0x15):
+            return hex(int.from_bytes(raw, "little"))
+        if value_type == 0x11:
+            return filetime(struct.unpack_from("<Q", raw)[0])
+        if value_type == 0x12:
+            year, month, _, day, hour, minute, second, ms = struct.unpack_from("<8H", raw)
+            return datetime(year, month, day, hour, minute, second, ms * 1000)
+        if value_type == 0x13:
+            return _sid(raw)
+        if value_type == 0x21:
+            nodes, _ = self.content(pos)
+            return nodes
+        if value_type == 0x81:
+            return ", ".join(s for s in raw.decode("utf-16-le", "replace").split("\x00") if s)
+        if value_type & 0x80 and (value_type & 0x7F) in _FIXED:
+            fmt = _FIXED[value_type & 0x7F]
+            step = struct.calcsize(fmt)
+            return ", ".join(str(struct.unpack_from(fmt, raw, i)[0]) for i in range(0, size - step + 1, step))
+        return raw.hex().upper()
+
+    def record(self, pos: int) -> EvtxRecord:
+        record_id, written = struct.unpack_from("<QQ", self.data, pos + 8)
+        nodes, _ = self.content(pos + 24)
+        event = next(node for node in nodes if isinstance(node, _Element))
+        return _to_record(event, record_id, filetime(written))
+
+
+def _sid(raw: bytes) -> str:
+    revision, count = raw[0], raw[1]
+    authority = int.from_bytes(raw[2:8], "big")
+    subs = struct.unpack_from(f"<{count}I", raw, 8)
+    return "S-" + "-".join(str(part) for part in (revision, authority) + subs)
+
+
+def _resolve(nodes: List, values: List) -> List:
+    """
+    Instantiates a parsed template with a record's substitution values.
+    Empty values drop their attribute or text; embedded BinXML is spliced in.
+    """
+    out = []
+    for node in nodes:
+        if isinstance(node, _Sub):
+            value = values[node.index] if node.index < len(values) else None
+            if isinstance(value, list):
+                out.extend(value)
+            elif value is not None and value != "":
+                out.append(value)
+        elif isinstance(node, _Element):
+            attrs = {}
+            for name, parts in node.attrs.items():
+                resolved = _resolve(parts, values)
+                if resolved:
+                    attrs[name] = resolved[0] if len(resolved) == 1 else "".join(_text(p) for p in resolved)
+            out.append(_Element(node.name, attrs, _resolve(node.children, values)))
+        else:
+            out.append(node)
+    return out
+
+
+def _to_record(event: _Element, record_id: int, written: datetime) -> EvtxRecord:
+    system = event.child("System") or _Element("System", {}, [])
+
+    def text_of(name: str) -> str:
+        element = system.child(name)
+        return element.text() if element else ""
+
+    provider = system.child("Provider")
+    provider_name = ""
+    if provider:
+        provider_name = str(provider.attrs.get("Name") or provider.attrs.get("EventSourceName") or "")
+    event_id = text_of("EventID")
+    level = text_of("Level")
+    created = system.child("TimeCreated")
+    timestamp = created.attrs.get("SystemTime") if created else None
+    correlation = system.child("Correlation")
+    activity_id = correlation.attrs.get("ActivityID") if correlation else None
+
+    data = []
+    event_data = event.child("EventData")
+    if event_data:
+        for item in event_data.elements():
+            name = item.attrs.get("Name")
+            data.append((str(name) if name else None, item.text()))
+    user_data = event.child("UserData")
+    if user_data:
+        for root in user_data.elements():
+            data.extend((leaf.name, leaf.text()) for leaf in root.elements())
+
+    return EvtxRecord(
+        record_id=record_id,
+        timestamp=timestamp if isinstance(timestamp, datetime) else written,
+        event_id=int(event_id) if event_id.isdigit() else None,
+        level=LEVELS.get(int(level), "INFO") if level.isdigit() else "INFO",
+        provider=provider_name,
+        channel=text_of("Channel"),
+        computer=text_of("Computer"),
+        activity_id=str(activity_id) if activity_id else None,
+        data=data,
+    )
+
+
+def parse_chunk(data: bytes) -> List[EvtxRecord]:
+    """
+    Parses all records of one 64 KB chunk. Corrupt records are skipped.
+    """
+    if data[:8] != CHUNK_MAGIC:
+        return []
+    end = min(struct.unpack_from("<I", data, 48)[0], len(data))
+    chunk = _Chunk(data)
+    records = []
+    pos = CHUNK_HEADER_SIZE
+    while pos + 28 <= end and data[pos:pos + 4] == RECORD_MAGIC:
+        size = struct.unpack_from("<I", data, pos + 4)[0]
+        if size < 28 or pos + size > len(data):
+            break
+        try:
+            records.append(chunk.record(pos))
+        except (struct.error, IndexError, ValueError, StopIteration, OverflowError):
+            pass
+        pos += size
+    return records
+
+
+def chunk_offsets(path: str) -> List[int]:
+    """
+    File offsets of all chunks, ordered by their first record number
+    (the log is circular, so the oldest chunk is not necessarily the first one).
+    """
+    with open(path, "rb") as f:
+        header = f.read(4096)
+        if header[:8] != FILE_MAGIC:
+            raise ValueError(f"{path} is not an EVTX file")
+        header_size = struct.unpack_from("<H", header, 40)[0] or 4096
+        firsts = []
+        for offset in range(header_size, os.path.getsize(path) - CHUNK_HEADER_SIZE + 1, CHUNK_SIZE):
+            f.seek(offset)
+            head = f.read(16)
+            if head[:8] == CHUNK_MAGIC:
+                firsts.append((struct.unpack_from("<Q", head, 8)[0], offset))
+    return [offset for _, offset in sorted(firsts)]
+
+
+def _parse_chunk_at(job: Tuple[str, int]) -> List[EvtxRecord]:
+    path, offset = job
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return parse_chunk(f.read(CHUNK_SIZE))
+
+
+def iter_records(path: str, workers: Optional[int] = None) -> Iterator[EvtxRecord]:
+    """
+    Streams the records of an EVTX file in record order. Chunks are parsed in up to
+    `workers` processes (default: one per CPU; 1 parses in-process); only a few
+    chunks are in flight at a time, so memory stays bounded for large logs.
+    """
+    jobs = [(str(path), offset) for offset in chunk_offsets(path)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < PARALLEL_MIN_CHUNKS:
+        for job in jobs:
+            yield from _parse_chunk_at(job)
+        return
+
+    in_flight = 4 * workers
+    # Ingestion runs in a worker thread of the multi-threaded Streamlit server, and
+    # forking a threaded process can deadlock, so workers are spawned fresh
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_parse_chunk_at, job))
+            if len(pending) >= in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def render_line(record: EvtxRecord) -> str:
+    """
+    One-line text form of a record, parsed by the "evtx" format in parsers.py.
+    """
+    parts = [record.timestamp.strftime("%Y-%m-%d %H:%M:%S"), record.level, f"[{record.provider}]",
+             f"EventID={record.event_id}"]
+    if record.channel:
+        parts.append(f"Channel={record.channel}")
+    if record.computer:
+        parts.append(f"Computer={record.computer}")
+    if record.activity_id:
+        parts.append(f"correlation={record.activity_id.strip('{}')}")
+    for name, value in record.data:
+        parts.append(f"{name}={value}" if name else value)
+    return " ".join(" ".join(str(p).split()) for p in parts if p != "")
+
+
+def read_lines(path: str, workers: Optional[int] = None) -> List[str]:
+    """
+    All records of an EVTX file as text lines (see render_line).
+    """
+    return [render_line(record) + "\n" for record in iter_records(path, workers)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    for arg in sys.argv[1:]:
+        for record in iter_records(arg):
+            print(render_line(record))
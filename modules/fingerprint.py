@@ -0,0 +1,185 @@
+"""
+fingerprint.py – Cross-build log diff for SKC Log Reader
+
+Reduces a run to a compact fingerprint that is stored next to the run history:
+- Hashed error templates with counts (see analysis.line_template)
+- Category counts
+- A MinHash signature over the template set, for finding the most similar earlier run
+New bundles are diffed against any saved run without re-parsing the old logs.
+"""
+
+import hashlib
+import json
+import random
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from modules.analysis import LogEvent, line_template
+from modules.history import HISTORY_FILE
+
+FINGERPRINT_FILE = HISTORY_FILE.with_name("run_fingerprints.jsonl")
+NUM_PERM = 128
+MAX_TEMPLATES = 5000
+MAX_SAMPLES = 200
+ERROR_LEVELS = {"WARNING", "ERROR", "CRITICAL"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(42)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def signature_of(template: str) -> str:
+    """
+    Short stable hash identifying a message template.
+    """
+    return hashlib.blake2b(template.encode("utf-8", "ignore"), digest_size=8).hexdigest()
+
+
+def is_error(event: LogEvent) -> bool:
+    return event.severity >= 2 or (event.level or "") in ERROR_LEVELS
+
+
+def minhash(signatures: Iterable[str]) -> List[int]:
+    """
+    MinHash signature of a set of template hashes.
+    """
+    values = [int(sig, 16) for sig in signatures]
+    if not values:
+        return [_MERSENNE_PRIME] * NUM_PERM
+    return [min((a * v + b) % _MERSENNE_PRIME for v in values) for a, b in _PERMUTATIONS]
+
+
+class Fingerprinter:
+    """
+    Builds a run fingerprint incrementally, one event at a time, so it can be fed
+    from a stream alongside other consumers (see pipeline.analyze_upload).
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.categories = Counter()
+        self.samples = {}
+        self.total = 0
+
+    def add(self, event: LogEvent) -> None:
+        self.total += 1
+        self.categories[event.category] += 1
+        if not is_error(event):
+            return
+        template = line_template(event.raw)
+        sig = signature_of(template)
+        self.counts[sig] += 1
+        if sig not in self.samples:
+            self.samples[sig] = template[:200]
+
+    def update(self, events: Iterable[LogEvent]) -> "Fingerprinter":
+        for event in events:
+            self.add(event)
+        return self
+
+    def result(self) -> Dict:
+        return {
+            "total_events": self.total,
+            "categories": dict(self.categories),
+            "templates": dict(self.counts.most_common(MAX_TEMPLATES)),
+            "samples": {sig: self.samples[sig] for sig, _ in self.counts.most_common(MAX_SAMPLES)},
+            "minhash": minhash(self.counts),
+        }
+
+
+def fingerprint_events(events: Iterable[LogEvent]) -> Dict:
+    """
+    Builds the fingerprint of a run from its parsed events.
+    """
+    return Fingerprinter().update(events).result()
+
+
+def similarity(a: Dict, b: Dict) -> float:
+    """
+    Estimated Jaccard similarity of two runs' template sets.
+    """
+    sig_a, sig_b = a.get("minhash", []), b.get("minhash", [])
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def save_fingerprint(fp: Dict, metadata: Optional[Dict] = None, path: Path = FINGERPRINT_FILE) -> str:
+    """
+    Appends a run fingerprint to the fingerprint store and returns its run ID.
+    """
+    run_id = uuid.uuid4().hex[:12]
+    record = {
+        "run_id": run_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "metadata": metadata or {},
+        "fingerprint": fp,
+    }
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except Exception as e:
+        print(f"⚠️ Failed to save run fingerprint: {e}")
+    return run_id
+
+
+def load_fingerprints(path: Path = FINGERPRINT_FILE) -> List[Dict]:
+    """
+    Loads all saved run fingerprints, oldest first.
+    """
+    if not path.exists():
+        return []
+    runs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                runs.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return runs
+
+
+def nearest_run(fp: Dict, runs: List[Dict], exclude: Iterable[str] = ()) -> Optional[Dict]:
+    """
+    Returns the saved run whose template set is most similar to fp.
+    Runs whose IDs are in exclude (e.g. saved copies of the current run) are skipped.
+    """
+    exclude = set(exclude)
+    candidates = [run for run in runs if run.get("run_id") not in exclude]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda run: similarity(fp, run["fingerprint"]))
+
+
+def diff_fingerprints(new: Dict, old: Dict, spike_ratio: float = 2.0, min_count: int = 5) -> Dict:
+    """
+    Compares two fingerprints and lists new, vanished and spiking error signatures.
+    Spikes compare rates (count / total events) so runs of different size are comparable.
+    """
+    new_t, old_t = new.get("templates", {}), old.get("templates", {})
+    new_total, old_total = max(new.get("total_events", 0), 1), max(old.get("total_events", 0), 1)
+    samples = {**old.get("samples", {}), **new.get("samples", {})}
+
+    def row(sig):
+        return {"signature": sig, "template": samples.get(sig, ""), "count": new_t.get(sig, 0), "previous": old_t.get(sig, 0)}
+
+    appeared = [row(sig) for sig in new_t if sig not in old_t]
+    vanished = [row(sig) for sig in old_t if sig not in new_t]
+    spiking = [
+        row(sig) for sig, count in new_t.items()
+        if sig in old_t and count >= min_count and count / new_total >= spike_ratio * old_t[sig] / old_total
+    ]
+    categories = {
+        cat: {"count": new.get("categories", {}).get(cat, 0), "previous": old.get("categories", {}).get(cat, 0)}
+        for cat in set(new.get("categories", {})) | set(old.get("categories", {}))
+    }
+    return {
+        "similarity": round(similarity(new, old), 3),
+        "new": sorted(appeared, key=lambda r: r["count"], reverse=True),
+        "vanished": sorted(vanished, key=lambda r: r["previous"], reverse=True),
+        "spiking": sorted(spiking, key=lambda r: r["count"], reverse=True),
+        "categories": categories,
+    }
@@ -3,25 +3,44 @@ ingestion.py – Handles log ingestion for SKC Log Reader
 
 Supports single log files, folders, or ZIP uploads.
 Handles recursive scanning and returns list of log lines with file metadata.
+Windows .evtx event logs are decoded natively (see evtx.py) into one line per event,
+and text files are decoded in their sniffed encoding (see parsers.py).
 Safe for Streamlit Cloud and local environments using relative paths.
 """
 
 import os
 import zipfile
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 from pathlib import Path
 
-SUPPORTED_EXTENSIONS = [".log", ".txt", ".json", ".csv"]
+from modules.parsers import SNIFF_BYTES, sniff_encoding
+from modules.workspace import WorkspaceQuotaError
+
+SUPPORTED_EXTENSIONS = [".log", ".txt", ".json", ".csv", ".evtx"]
 EXTRACT_DIR = Path("temp_extracted")
+# Placeholder line for files that could not be read
+READ_ERROR_PREFIX = "⚠️ Error reading file:"
+
+
+def zip_uncompressed_size(zip_path: str) -> int:
+    """
+    Returns the total uncompressed size declared by a ZIP file's entries.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return sum(info.file_size for info in zip_ref.infolist())
 
 
-def extract_zip(zip_path: str, extract_to: Path = EXTRACT_DIR) -> Path:
+def extract_zip(zip_path: str, extract_to: Path = EXTRACT_DIR, check: Optional[Callable[[], None]] = None) -> Path:
     """
     Extracts a ZIP file to a temp directory and returns the path.
+    check, if given, is called before each member (e.g. to stop a cancelled job).
     """
     extract_to.mkdir(parents=True, exist_ok=True)
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_to)
+        for member in zip_ref.infolist():
+            if check:
+                check()
+            zip_ref.extract(member, extract_to)
     return extract_to
 
 
@@ -32,29 +51,47 @@ def collect_log_files(directory: Path) -> List[Path]:
     return [p for p in directory.rglob("*") if p.suffix.lower() in SUPPORTED_EXTENSIONS and p.is_file()]
 
 
-def read_logs_from_files(file_paths: List[Path]) -> List[Tuple[str, List[str]]]:
+def read_logs_from_files(file_paths: List[Path], check: Optional[Callable[[], None]] = None) -> List[Tuple[str, List[str]]]:
     """
     Reads lines from each file and returns a list of (filename, lines) tuples.
+    check, if given, is called before each file.
     """
     results = []
     for file in file_paths:
+        # Outside the try below, so a cancellation is not recorded as a read error
+        if check:
+            check()
         try:
-            with open(file, "r", encoding="utf-8", errors="ignore") as f:
-                lines = f.readlines()
+            if file.suffix.lower() == ".evtx":
+                from modules.evtx import read_lines
+                lines = read_lines(str(file))
+            else:
+                # CBS/DISM/setupapi logs are often UTF-16 or carry a BOM
+                with open(file, "rb") as f:
+                    encoding = sniff_encoding(f.read(SNIFF_BYTES))
+                with open(file, "r", encoding=encoding, errors="ignore") as f:
+                    lines = f.readlines()
             results.append((str(file), lines))
         except Exception as e:
-            results.append((str(file), [f"⚠️ Error reading file: {e}"]))
+            results.append((str(file), [f"{READ_ERROR_PREFIX} {e}"]))
     return results
 
 
-def ingest(input_path: str) -> List[Tuple[str, List[str]]]:
+def ingest(input_path: str, extract_to: Path = EXTRACT_DIR, max_bytes: Optional[int] = None,
+           check: Optional[Callable[[], None]] = None) -> List[Tuple[str, List[str]]]:
     """
     Ingests a ZIP file or directory of logs and returns parsed content.
+    ZIPs are extracted into extract_to; max_bytes caps their uncompressed size
+    (WorkspaceQuotaError is raised if it is exceeded).
+    check, if given, is called per ZIP member and per file, so a background job
+    can be cancelled during ingestion (see jobs.JobContext.check).
     """
     path_obj = Path(input_path)
 
     if path_obj.suffix == ".zip":
-        extracted_path = extract_zip(input_path)
+        if max_bytes is not None and zip_uncompressed_size(input_path) > max_bytes:
+            raise WorkspaceQuotaError("ZIP contents exceed the workspace disk quota")
+        extracted_path = extract_zip(input_path, extract_to, check)
         files = collect_log_files(extracted_path)
     elif path_obj.is_dir():
         files = collect_log_files(path_obj)
@@ -63,4 +100,11 @@ def ingest(input_path: str) -> List[Tuple[str, List[str]]]:
     else:
         return [("Unknown Input", ["❌ Unsupported input format"])]
 
-    return read_logs_from_files(files)
+    return read_logs_from_files(files, check)
+
+
+def has_read_errors(files: List[Tuple[str, List[str]]]) -> bool:
+    """
+    True if any file could not be read (its content is a read-error placeholder).
+    """
+    return any(len(lines) == 1 and lines[0].startswith(READ_ERROR_PREFIX) for _, lines in files)
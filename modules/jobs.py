@@ -0,0 +1,211 @@
+"""
+jobs.py – Background analysis jobs for SKC Log Reader
+
+Runs heavy pipeline stages off the Streamlit script thread:
+- A bounded, process-wide worker pool shared by all sessions
+- Per-stage progress (lines processed, throughput) that the UI can poll
+- Cooperative cancellation, checked as lines are processed
+- Jobs outlive a page reload, so a session can reattach by job ID
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+MAX_WORKERS = 2
+FINISHED_JOB_TTL_S = 3600
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job when cancellation has been requested.
+    """
+
+
+@dataclass
+class StageProgress:
+    name: str
+    lines: int = 0
+    total: Optional[int] = None
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """
+        Lines per second for this stage.
+        """
+        return self.lines / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class Job:
+    def __init__(self, owner: Optional[str] = None, name: str = "job"):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.name = name
+        self.status = QUEUED
+        self.stages: List[StageProgress] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+
+    @property
+    def current_stage(self) -> Optional[StageProgress]:
+        return self.stages[-1] if self.stages else None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def snapshot(self) -> Dict:
+        """
+        Plain-dict view of the job for display.
+        """
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "stages": [
+                {
+                    "stage": s.name,
+                    "lines": s.lines,
+                    "total": s.total,
+                    "seconds": round(s.elapsed, 1),
+                    "lines_per_s": int(s.throughput),
+                    "done": s.finished is not None,
+                }
+                for s in self.stages
+            ],
+        }
+
+
+class JobContext:
+    """
+    Handle passed to job functions for reporting progress and checking cancellation.
+    """
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def stage(self, name: str, total: Optional[int] = None) -> None:
+        """
+        Finishes the current stage (if any) and starts a new one.
+        """
+        self.check()
+        if self.job.current_stage and not self.job.current_stage.finished:
+            self.job.current_stage.finished = time.time()
+        self.job.stages.append(StageProgress(name, total=total))
+
+    def advance(self, lines: int = 1) -> None:
+        """
+        Adds processed lines to the current stage; raises JobCancelled if cancellation was requested.
+        """
+        self.check()
+        if self.job.current_stage:
+            self.job.current_stage.lines += lines
+
+    def check(self) -> None:
+        if self.job._cancel.is_set():
+            raise JobCancelled()
+
+
+class JobManager:
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="skc-job")
+        self.jobs: Dict[str, Job] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, owner: Optional[str] = None, name: str = "job", **kwargs) -> Job:
+        """
+        Queues fn(ctx, *args, **kwargs) on the worker pool and returns its Job.
+        """
+        self.prune()
+        job = Job(owner, name)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args, kwargs) -> None:
+        ctx = JobContext(job)
+        try:
+            ctx.check()
+            job.status = RUNNING
+            job.result = fn(ctx, *args, **kwargs)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+            if job.current_stage and not job.current_stage.finished:
+                job.current_stage.finished = job.finished
+
+    def get(self, job_id: Optional[str], owner: Optional[str] = None) -> Optional[Job]:
+        """
+        Looks up a job; if owner is given, only that owner's jobs are returned.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id) if job_id else None
+        if job and owner is not None and job.owner != owner:
+            return None
+        return job
+
+    def jobs_for(self, owner: str) -> List[Job]:
+        # Other sessions submit and prune jobs concurrently, so read under the lock
+        with self.lock:
+            return [j for j in self.jobs.values() if j.owner == owner]
+
+    def cancel(self, job_id: str) -> None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job:
+            job.cancel()
+
+    def forget(self, job_id: str) -> None:
+        """
+        Drops a finished job (and its result) once the session has collected it.
+        """
+        with self.lock:
+            self.jobs.pop(job_id, None)
+
+    def prune(self, ttl_s: int = FINISHED_JOB_TTL_S) -> None:
+        """
+        Drops finished jobs that nobody collected within ttl_s.
+        """
+        cutoff = time.time() - ttl_s
+        with self.lock:
+            for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished < cutoff]:
+                del self.jobs[job_id]
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_manager() -> JobManager:
+    """
+    Process-wide job manager shared by all Streamlit sessions.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
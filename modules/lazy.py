@@ -0,0 +1,36 @@
+"""
+lazy.py – Deferred module loading for SKC Log Reader
+
+Optional or heavy subsystems (GPT RCA, PDF reports, the processing pipeline)
+are only imported the first time one of their attributes is used. Imported
+modules stay in sys.modules, so later Streamlit reruns pay nothing.
+"""
+
+import importlib
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a module that imports the real one on first attribute access.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_target = name
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self._lazy_target)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        loaded = "loaded" if self._lazy_target in sys.modules else "not loaded"
+        return f"<lazy module '{self._lazy_target}' ({loaded})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns the module if it is already imported, otherwise a LazyModule placeholder.
+    """
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,320 @@
+"""
+parsers.py – Format-sniffing parser registry for SKC Log Reader
+
+Windows servicing logs each have their own layout, which the generic
+timestamp/level regexes in analysis.py get wrong. Every ingested file is
+sniffed once, from its name and its first few KB, and then parsed with the
+parser of its format:
+- CBS.log and dism.log ("2024-01-01 10:00:00, Error   CBS   ...")
+- setupapi.dev.log (section headers carry the date, "!!!" marks errors)
+- WindowsUpdate.log (old tab-separated and new ETW-decoded layouts)
+- Lines rendered from .evtx event logs (see evtx.py)
+- Anything else: the generic LogAnalyzer.parse_line
+
+Format parsers only give the format's category (CBS, DISM, Installer,
+WindowsUpdate, ServiceFailure, ...) to warnings and errors, so routine
+informational lines do not trigger recommendations.
+New formats are added with register().
+"""
+
+import codecs
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from modules.analysis import LogAnalyzer, LogEvent, classify_line, compiled_rules, parse_timestamp
+
+SNIFF_BYTES = 4096
+SNIFF_LINES = 50
+
+# Severity of format-specific warnings and errors
+LEVEL_SEVERITY = {"CRITICAL": 5, "ERROR": 4, "WARNING": 2}
+
+# Event log providers whose warnings and errors map to a recommendation category
+PROVIDER_CATEGORIES = {
+    "Service Control Manager": "ServiceFailure",
+    "Microsoft-Windows-WindowsUpdateClient": "WindowsUpdate",
+    "Application Error": "Crash",
+    "Application Hang": "Crash",
+    "Windows Error Reporting": "Crash",
+    "MsiInstaller": "Installer",
+    "Microsoft-Windows-Servicing": "CBS",
+}
+
+# Event IDs that identify an issue more precisely than their provider's category.
+# Event IDs are only unique per provider, so the table is keyed by both.
+EVENT_ID_SIGNATURES = {
+    ("Application Error", 1000): ("Crash", 5),                 # Faulting application
+    ("Application Hang", 1002): ("Crash", 4),                  # Application stopped responding
+    ("Service Control Manager", 7000): ("ServiceFailure", 4),  # Service failed to start
+    ("Service Control Manager", 7001): ("ServiceFailure", 4),  # Dependency service failed to start
+    ("Service Control Manager", 7009): ("ServiceFailure", 4),  # Service start timed out
+    ("Service Control Manager", 7011): ("ServiceFailure", 3),  # Service transaction timed out
+    ("Service Control Manager", 7023): ("ServiceFailure", 4),  # Service terminated with an error
+    ("Service Control Manager", 7024): ("ServiceFailure", 4),  # Service terminated with a service-specific error
+    ("Service Control Manager", 7031): ("ServiceFailure", 4),  # Service terminated unexpectedly (recovery action taken)
+    ("Service Control Manager", 7034): ("ServiceFailure", 4),  # Service terminated unexpectedly
+}
+
+LineParser = Callable[[str], LogEvent]
+
+
+@dataclass
+class LogFormat:
+    name: str
+    # (lower-case file name, first non-empty lines) -> score; the highest score wins
+    sniff: Callable[[str, List[str]], float]
+    # analyzer -> per-file line parser (a fresh one per file, so parsers may keep state)
+    make_parser: Callable[[LogAnalyzer], LineParser]
+
+
+FORMATS: List[LogFormat] = []
+
+
+def register(fmt: LogFormat) -> LogFormat:
+    """
+    Adds a format to the registry (later registrations win ties).
+    """
+    FORMATS.insert(0, fmt)
+    return fmt
+
+
+def sniff_encoding(head: bytes) -> str:
+    """
+    Text encoding of a file from its first bytes: BOM first, then the NUL-byte
+    pattern of BOM-less UTF-16, otherwise UTF-8.
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    sample = head[:SNIFF_BYTES]
+    if len(sample) >= 4 and sample.count(0) >= len(sample) // 4:
+        # ASCII text in UTF-16 has a NUL in every other byte
+        odd_nuls = sample[1::2].count(0)
+        even_nuls = sample[0::2].count(0)
+        return "utf-16-le" if odd_nuls >= even_nuls else "utf-16-be"
+    return "utf-8"
+
+
+def peek(lines: Iterable[str], count: int = SNIFF_LINES) -> Tuple[List[str], Iterator[str]]:
+    """
+    First lines of a stream for sniffing (up to SNIFF_BYTES of text), and the full stream.
+    """
+    iterator = iter(lines)
+    head, size = [], 0
+    for line in islice(iterator, count):
+        head.append(line)
+        size += len(line)
+        if size >= SNIFF_BYTES:
+            break
+    return head, chain(head, iterator)
+
+
+def sniff_format(filename: Optional[str], head: List[str]) -> LogFormat:
+    """
+    Best-scoring registered format for a file (generic if nothing scores higher).
+    """
+    name = (filename or "").replace("\\", "/").rsplit("/", 1)[-1].lower()
+    sample = [line for line in head if line.strip()]
+    return max(FORMATS, key=lambda fmt: fmt.sniff(name, sample))
+
+
+def parser_for(filename: Optional[str], head: List[str], analyzer: LogAnalyzer) -> Tuple[str, LineParser]:
+    """
+    Format name and a fresh line parser for a file.
+    """
+    fmt = sniff_format(filename, head)
+    return fmt.name, fmt.make_parser(analyzer)
+
+
+def _fraction(text: str) -> timedelta:
+    return timedelta(microseconds=int(text[:6].ljust(6, "0"))) if text else timedelta(0)
+
+
+def _match_ratio(regex: re.Pattern, sample: List[str]) -> float:
+    return sum(1 for line in sample if regex.match(line)) / len(sample) if sample else 0.0
+
+
+def _scored(ratio: float, name_matches: bool) -> float:
+    """
+    Content match ratio, boosted when the file name is the format's usual one.
+    """
+    return ratio + 0.5 if ratio and name_matches else ratio
+
+
+def _untimed(line: str) -> LogEvent:
+    return LogEvent(None, line.strip(), None, "Other", 1, None)
+
+
+# --- Generic ---
+
+register(LogFormat("generic", lambda name, sample: 0.1, lambda analyzer: analyzer.parse_line))
+
+
+# --- CBS.log / dism.log ---
+
+CBS_LINE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}), (Info|Warning|Error|Perf)\s+(\S+)\s+(.*)")
+CBS_COMPONENTS = {"CBS": "CBS", "CSI": "CBS", "DPX": "CBS", "TI": "CBS", "DISM": "DISM"}
+# Failures that CBS/DISM log at Info level still carry a failing HRESULT
+FAILED_HRESULT = re.compile(r"(?:HRESULT|hr|error)\s*[=:]\s*0x8[0-9a-f]{7}", re.IGNORECASE)
+
+
+def _component_parser(default_category: str) -> Callable[[LogAnalyzer], LineParser]:
+    def make_parser(analyzer: LogAnalyzer) -> LineParser:
+        def parse(line: str) -> LogEvent:
+            match = CBS_LINE.match(line)
+            if not match:
+                return _untimed(line)
+            ts_text, level_text, component, message = match.groups()
+            level = "INFO" if level_text == "Perf" else level_text.upper()
+            category, severity = "Other", LEVEL_SEVERITY.get(level, 1)
+            if severity > 1:
+                category = CBS_COMPONENTS.get(component, default_category)
+            elif FAILED_HRESULT.search(message):
+                category, severity = CBS_COMPONENTS.get(component, default_category), 3
+            return LogEvent(parse_timestamp(ts_text, "%Y-%m-%d %H:%M:%S"), line.strip(), level, category, severity, None)
+        return parse
+    return make_parser
+
+
+def _component_share(sample: List[str], dism: bool) -> float:
+    matches = [m for m in map(CBS_LINE.match, sample) if m]
+    return sum(1 for m in matches if (m.group(3) == "DISM") == dism) / len(sample) if sample else 0.0
+
+
+register(LogFormat(
+    "cbs",
+    lambda name, sample: _scored(_component_share(sample, dism=False), name.startswith("cbs")),
+    _component_parser("CBS"),
+))
+register(LogFormat(
+    "dism",
+    lambda name, sample: _scored(_component_share(sample, dism=True), name.startswith("dism")),
+    _component_parser("DISM"),
+))
+
+
+# --- setupapi.dev.log / setupapi.app.log ---
+
+SETUPAPI_MARKER = re.compile(r"(?:>>>|<<<)\s+(?:\[|Section)|\[Boot Session:|\[Device Install")
+SETUPAPI_DATETIME = re.compile(r"(\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2})(?:\.(\d+))?")
+SETUPAPI_TIME = re.compile(r"\b(\d{2}:\d{2}:\d{2})(?:\.(\d+))?\s*$")
+
+
+class _SetupApiParser:
+    """
+    Stateful: only section headers carry a date, body lines at most a time of day.
+    """
+
+    def __init__(self, analyzer: LogAnalyzer):
+        self.date: Optional[datetime] = None
+
+    def __call__(self, line: str) -> LogEvent:
+        ts = None
+        match = SETUPAPI_DATETIME.search(line)
+        if match:
+            ts = parse_timestamp(match.group(1), "%Y/%m/%d %H:%M:%S") + _fraction(match.group(2))
+            self.date = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+        elif self.date is not None:
+            match = SETUPAPI_TIME.search(line)
+            if match:
+                clock = parse_timestamp(match.group(1), "%H:%M:%S")
+                ts = self.date + timedelta(hours=clock.hour, minutes=clock.minute, seconds=clock.second) + _fraction(match.group(2))
+
+        if line.startswith("!!!") or "Exit status: FAILURE" in line:
+            level = "ERROR"
+        elif line.startswith("!"):
+            level = "WARNING"
+        else:
+            level = "INFO"
+        category = "Installer" if level == "ERROR" else "Other"
+        return LogEvent(ts, line.strip(), level, category, LEVEL_SEVERITY.get(level, 1), None)
+
+
+register(LogFormat(
+    "setupapi",
+    lambda name, sample: _scored(min(1.0, 4 * _match_ratio(SETUPAPI_MARKER, sample)), name.startswith("setupapi")),
+    _SetupApiParser,
+))
+
+
+# --- WindowsUpdate.log ---
+
+# Windows 10+ (Get-WindowsUpdateLog): "2024/01/01 10:00:00.1234567 1234  5678  Agent   message"
+WU_LINE = re.compile(r"(\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2})\.(\d+)\s+\d+\s+\d+\s+(\S+)\s+(.*)")
+# Windows 7/8: "2024-01-01\t10:00:00:123\t 1234\t5678\tAgent\tmessage"
+WU_LEGACY_LINE = re.compile(r"(\d{4}-\d{2}-\d{2})\t(\d{2}:\d{2}:\d{2}):(\d{3})\t\s*\d+\t\s*[0-9a-fA-F]+\t(\S+)\t(.*)")
+WU_ERROR = re.compile(r"\b(?:fatal|failed|error)\b|exit code = 0x8", re.IGNORECASE)
+WU_WARNING = re.compile(r"\bWARNING:")
+
+
+def _windows_update_parser(analyzer: LogAnalyzer) -> LineParser:
+    def parse(line: str) -> LogEvent:
+        match = WU_LINE.match(line)
+        if match:
+            ts_text, fraction, _, message = match.groups()
+            ts = parse_timestamp(ts_text, "%Y/%m/%d %H:%M:%S") + _fraction(fraction)
+        else:
+            match = WU_LEGACY_LINE.match(line)
+            if not match:
+                return _untimed(line)
+            day, clock, millis, _, message = match.groups()
+            ts = parse_timestamp(f"{day} {clock}", "%Y-%m-%d %H:%M:%S") + _fraction(millis)
+        # "WARNING: Send failed ..." is a warning, so the explicit marker is checked first
+        if WU_WARNING.search(message):
+            level = "WARNING"
+        elif WU_ERROR.search(message):
+            level = "ERROR"
+        else:
+            level = "INFO"
+        category = "WindowsUpdate" if level != "INFO" else "Other"
+        return LogEvent(ts, line.strip(), level, category, LEVEL_SEVERITY.get(level, 1), None)
+    return parse
+
+
+register(LogFormat(
+    "windowsupdate",
+    lambda name, sample: _scored(max(_match_ratio(WU_LINE, sample), _match_ratio(WU_LEGACY_LINE, sample)),
+                                 name.startswith("windowsupdate")),
+    _windows_update_parser,
+))
+
+
+# --- Event log lines (evtx.render_line) ---
+
+EVTX_LINE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) (INFO|DEBUG|WARNING|ERROR|CRITICAL) \[([^\]]*)\] EventID=(\d+|None)(.*)")
+
+
+def _evtx_parser(analyzer: LogAnalyzer) -> LineParser:
+    corr_re = compiled_rules()[2]
+
+    def parse(line: str) -> LogEvent:
+        match = EVTX_LINE.match(line)
+        if not match:
+            return _untimed(line)
+        ts_text, level, provider, event_text, message = match.groups()
+        event_id = int(event_text) if event_text != "None" else None
+        severity = LEVEL_SEVERITY.get(level, 1)
+        # Informational events are never issues, whatever their ID
+        if severity == 1:
+            category = "Other"
+        elif (provider, event_id) in EVENT_ID_SIGNATURES:
+            category, severity = EVENT_ID_SIGNATURES[provider, event_id]
+        elif provider in PROVIDER_CATEGORIES:
+            category = PROVIDER_CATEGORIES[provider]
+        else:
+            category = classify_line(message)[1]
+        corr_match = corr_re.search(message)
+        return LogEvent(parse_timestamp(ts_text, "%Y-%m-%d %H:%M:%S"), line.strip(), level, category, severity,
+                        corr_match.group(1) if corr_match else None, event_id)
+    return parse
+
+
+register(LogFormat(
+    "evtx",
+    lambda name, sample: _scored(_match_ratio(EVTX_LINE, sample), name.endswith(".evtx")),
+    _evtx_parser,
+))
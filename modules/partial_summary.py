@@ -0,0 +1,218 @@
+"""
+partial_summary.py – Mergeable partial summaries for SKC Log Reader
+
+A PartialSummary summarizes one contiguous, time-ordered shard of a timeline
+(a slice of one bundle, or a whole bundle processed on another machine).
+Partials serialize to plain JSON and merge associatively; merging the shards
+in timeline order gives exactly what LogAnalyzer.summary() returns for the
+whole stream in one pass, except that clusters are kept in the compact form
+of views.cluster_rows (category, count, start, end, sample) instead of with
+every event timestamp. A partial's size therefore grows with its number of
+clusters and gaps, not with its number of events.
+
+Typical worker usage:
+    result = pipeline.run_pipeline(shard_files, custom_words)
+    partial = PartialSummary.from_events(result.events, result.error_codes)
+    json.dump(partial.to_dict(), f)
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from modules.analysis import LogEvent, gap_anomaly
+
+
+def _ts_out(ts: Optional[datetime]) -> Optional[str]:
+    return ts.isoformat() if ts else None
+
+
+def _ts_in(text: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(text) if text else None
+
+
+def _extend(cluster: Dict, start: Optional[datetime], end: Optional[datetime]) -> None:
+    # Events without a timestamp join a cluster without changing its time range
+    if start:
+        cluster["start"] = min(cluster["start"], start) if cluster["start"] else start
+    if end:
+        cluster["end"] = max(cluster["end"], end) if cluster["end"] else end
+
+
+class PartialSummary:
+    def __init__(self, window_s: int = 5, max_gap_s: int = 300):
+        self.window_s = window_s
+        self.max_gap_s = max_gap_s
+        self.total = 0
+        self.categories: Counter = Counter()
+        self.severities: Counter = Counter()
+        self.error_codes: Counter = Counter()
+        # Time-ordered compact clusters; the first and last may still join a neighbouring shard
+        self.clusters: List[Dict] = []
+        self.gaps: List[str] = []
+        # Timestamps of the first/last event (may be None) decide cluster joins
+        self.first_event_ts: Optional[datetime] = None
+        self.last_event_ts: Optional[datetime] = None
+        # First/last non-empty timestamps decide the gap check at shard edges
+        self.first_ts: Optional[datetime] = None
+        self.last_ts: Optional[datetime] = None
+
+    def add(self, event: LogEvent) -> None:
+        """
+        Adds the next event of the shard (events must be added in timeline order).
+        """
+        if self.total == 0:
+            self.first_event_ts = event.timestamp
+            self.clusters.append(self._new_cluster(event))
+        else:
+            prev = self.last_event_ts
+            delta = (event.timestamp - prev).total_seconds() if (event.timestamp and prev) else 0
+            if delta <= self.window_s:
+                cluster = self.clusters[-1]
+                cluster["count"] += 1
+                _extend(cluster, event.timestamp, event.timestamp)
+            else:
+                self.clusters.append(self._new_cluster(event))
+        self.last_event_ts = event.timestamp
+
+        if event.timestamp:
+            if self.last_ts:
+                message = gap_anomaly(self.last_ts, event.timestamp, self.max_gap_s)
+                if message:
+                    self.gaps.append(message)
+            else:
+                self.first_ts = event.timestamp
+            self.last_ts = event.timestamp
+
+        self.total += 1
+        self.categories[event.category] += 1
+        self.severities[event.severity] += 1
+
+    def add_error_codes(self, codes: Dict[str, int]) -> None:
+        self.error_codes.update(codes)
+
+    @staticmethod
+    def _new_cluster(event: LogEvent) -> Dict:
+        return {
+            "category": event.category,
+            "count": 1,
+            "sample": event.raw,
+            "start": event.timestamp,
+            "end": event.timestamp,
+        }
+
+    @classmethod
+    def from_events(cls, events: Iterable[LogEvent], error_codes: Optional[Dict[str, int]] = None,
+                    window_s: int = 5, max_gap_s: int = 300) -> "PartialSummary":
+        partial = cls(window_s, max_gap_s)
+        for event in events:
+            partial.add(event)
+        partial.add_error_codes(error_codes or {})
+        return partial
+
+    def merge(self, later: "PartialSummary") -> "PartialSummary":
+        """
+        Combines this partial with the shard that directly follows it in the timeline.
+        Neither input is modified.
+        """
+        if (self.window_s, self.max_gap_s) != (later.window_s, later.max_gap_s):
+            raise ValueError("Cannot merge partial summaries built with different window or gap settings")
+        merged = PartialSummary(self.window_s, self.max_gap_s)
+        merged.total = self.total + later.total
+        merged.categories = self.categories + later.categories
+        merged.severities = self.severities + later.severities
+        merged.error_codes = self.error_codes + later.error_codes
+
+        clusters = [dict(c) for c in self.clusters]
+        later_clusters = [dict(c) for c in later.clusters]
+        if clusters and later_clusters:
+            delta = (later.first_event_ts - self.last_event_ts).total_seconds() \
+                if (later.first_event_ts and self.last_event_ts) else 0
+            if delta <= self.window_s:
+                head = later_clusters.pop(0)
+                clusters[-1]["count"] += head["count"]
+                _extend(clusters[-1], head["start"], head["end"])
+        merged.clusters = clusters + later_clusters
+
+        edge_gap = gap_anomaly(self.last_ts, later.first_ts, self.max_gap_s) if (self.last_ts and later.first_ts) else None
+        merged.gaps = self.gaps + ([edge_gap] if edge_gap else []) + later.gaps
+
+        merged.first_event_ts = self.first_event_ts if self.total else later.first_event_ts
+        merged.last_event_ts = later.last_event_ts if later.total else self.last_event_ts
+        merged.first_ts = self.first_ts or later.first_ts
+        merged.last_ts = later.last_ts or self.last_ts
+        return merged
+
+    def summary(self) -> Dict:
+        """
+        Same shape as LogAnalyzer.summary() with compact clusters (see views.cluster_rows),
+        plus severity and error-code counts.
+        """
+        anomalies = list(self.gaps) if self.first_ts else []
+        high = sum(count for sev, count in self.severities.items() if sev >= 4)
+        if self.first_ts and high > self.total * 0.4:
+            anomalies.append("⚠️ High proportion of critical errors detected.")
+        return {
+            "total_events": self.total,
+            "categories": dict(self.categories),
+            "clusters": [dict(c) for c in self.clusters],
+            "anomalies": anomalies,
+            "severity_histogram": dict(sorted(self.severities.items())),
+            "error_codes": dict(self.error_codes),
+        }
+
+    def to_dict(self) -> Dict:
+        """
+        JSON-serializable form, for shipping partials between processes or hosts.
+        """
+        return {
+            "window_s": self.window_s,
+            "max_gap_s": self.max_gap_s,
+            "total": self.total,
+            "categories": dict(self.categories),
+            "severities": {str(k): v for k, v in self.severities.items()},
+            "error_codes": dict(self.error_codes),
+            "clusters": [dict(c, start=_ts_out(c["start"]), end=_ts_out(c["end"])) for c in self.clusters],
+            "gaps": list(self.gaps),
+            "first_event_ts": _ts_out(self.first_event_ts),
+            "last_event_ts": _ts_out(self.last_event_ts),
+            "first_ts": _ts_out(self.first_ts),
+            "last_ts": _ts_out(self.last_ts),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PartialSummary":
+        partial = cls(data["window_s"], data["max_gap_s"])
+        partial.total = data["total"]
+        partial.categories = Counter(data["categories"])
+        partial.severities = Counter({int(k): v for k, v in data["severities"].items()})
+        partial.error_codes = Counter(data["error_codes"])
+        partial.clusters = [dict(c, start=_ts_in(c["start"]), end=_ts_in(c["end"])) for c in data["clusters"]]
+        partial.gaps = list(data["gaps"])
+        partial.first_event_ts = _ts_in(data["first_event_ts"])
+        partial.last_event_ts = _ts_in(data["last_event_ts"])
+        partial.first_ts = _ts_in(data["first_ts"])
+        partial.last_ts = _ts_in(data["last_ts"])
+        return partial
+
+
+def merge_partials(partials: Iterable[PartialSummary], sort: bool = False) -> PartialSummary:
+    """
+    Reduces partials into one. Pass them in timeline order, or set sort=True to order
+    independently produced partials (e.g. separate bundles) by their first timestamp.
+    Sorted partials only merge exactly if their time ranges do not overlap (their events
+    would interleave otherwise), so overlapping ones raise ValueError; merge such bundles'
+    events with timeline.merge_streams and summarize them in one pass instead.
+    """
+    partials = list(partials)
+    if sort:
+        partials.sort(key=lambda p: p.first_ts or datetime.max)
+        for earlier, later in zip(partials, partials[1:]):
+            if earlier.last_ts and later.first_ts and later.first_ts < earlier.last_ts:
+                raise ValueError(
+                    f"Cannot merge overlapping partial summaries exactly ({later.first_ts} is before {earlier.last_ts})"
+                )
+    merged = PartialSummary(partials[0].window_s, partials[0].max_gap_s) if partials else PartialSummary()
+    for partial in partials:
+        merged = merged.merge(partial)
+    return merged
@@ -0,0 +1,231 @@
+"""
+pipeline.py – Fused single-pass processing for SKC Log Reader
+
+Streams every ingested line exactly once through:
+- Redaction (with per-rule statistics and a small preview)
+- Event parsing and classification (on the redacted text), with a parser
+  chosen per file by its sniffed format (see parsers.py)
+- Error-code extraction (on the original text, as recommendations expect)
+- Optionally, an approximate sketch summary (see sketches.py), fed in the same pass,
+  together with any other per-event observers (e.g. histogram and fingerprint)
+Files are stitched into one timeline on the way (see timeline.py), so no
+intermediate full-size line lists are built.
+"""
+
+import shutil
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from modules import dataset_store, fingerprint, ingestion, parsers, timeseries, views
+from modules.analysis import LogAnalyzer, LogEvent
+from modules.line_cache import DEFAULT_MAXSIZE, CachedRedactor, LineCache
+from modules.recommendations import find_error_codes
+from modules.sketches import ApproximateSummary
+from modules.timeline import DEFAULT_BUFFER_SIZE, merge_streams, sorted_stream
+
+PREVIEW_SIZE = 10
+PROGRESS_EVERY = 5000
+
+
+@dataclass
+class PipelineResult:
+    events: List[LogEvent]
+    error_codes: Dict[str, int]
+    redaction: Dict
+    total_lines: int = 0
+    cache_stats: Dict = field(default_factory=dict)
+    # File name -> sniffed format name
+    formats: Dict[str, str] = field(default_factory=dict)
+    # Events produced, whether or not they were kept
+    total_events: int = 0
+
+
+@dataclass
+class _Stats:
+    total_lines: int = 0
+    redacted_count: int = 0
+    by_rule: Counter = field(default_factory=Counter)
+    error_codes: Counter = field(default_factory=Counter)
+    original: List[str] = field(default_factory=list)
+    redacted: List[str] = field(default_factory=list)
+
+
+def _process_file(lines: Iterable[str], redact: CachedRedactor, parse: parsers.LineParser, stats: _Stats,
+                  progress: Optional[Callable[[int], None]], sketch: Optional[ApproximateSummary] = None) -> Iterator[LogEvent]:
+    for line in lines:
+        stats.total_lines += 1
+        if progress and stats.total_lines % PROGRESS_EVERY == 0:
+            progress(PROGRESS_EVERY)
+        if sketch is not None:
+            # Hosts are counted before redaction masks them
+            sketch.add_hosts(line)
+        redacted, hits = redact(line)
+        if hits:
+            stats.redacted_count += 1
+            stats.by_rule.update(hits)
+        if len(stats.original) < PREVIEW_SIZE:
+            stats.original.append(line)
+            stats.redacted.append(redacted)
+        for code in find_error_codes(line):
+            stats.error_codes[code] += 1
+        try:
+            yield parse(redacted)
+        except Exception:
+            continue
+
+
+def run_pipeline(files: Iterable[Tuple[str, Iterable[str]]], custom_words: List[str] = [],
+                 analyzer: Optional[LogAnalyzer] = None, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 progress: Optional[Callable[[int], None]] = None, cache_size: int = DEFAULT_MAXSIZE,
+                 sketch: Optional[ApproximateSummary] = None, observers: Iterable[Callable[[LogEvent], None]] = (),
+                 keep_events: bool = True) -> PipelineResult:
+    """
+    Redacts, parses, classifies and extracts error codes from (filename, lines) pairs in one pass.
+    Events are appended to the analyzer in timeline order.
+    progress, if given, is called with the number of newly processed lines every PROGRESS_EVERY lines.
+    Repeated lines reuse cached redaction and classification results (see line_cache.py).
+    sketch, if given, is fed every event in timeline order (and every original line's host).
+    observers are called with every event in timeline order. With keep_events=False the
+    events are only streamed to the sketch and observers, and the analyzer stays empty.
+    """
+    analyzer = analyzer or LogAnalyzer()
+    if analyzer.cache is None:
+        analyzer.cache = LineCache(cache_size)
+    redact = CachedRedactor(custom_words, cache_size)
+    stats = _Stats()
+    formats = {}
+    streams = []
+    for fname, lines in files:
+        head, lines = parsers.peek(lines)
+        formats[fname], parse = parsers.parser_for(fname, head, analyzer)
+        streams.append(sorted_stream(_process_file(lines, redact, parse, stats, progress, sketch), buffer_size))
+    observers = list(observers)
+    if sketch is not None:
+        observers.insert(0, partial(sketch.add, count_hosts=False))
+    total_events = 0
+    for event in merge_streams(streams):
+        total_events += 1
+        for observe in observers:
+            observe(event)
+        if keep_events:
+            analyzer.events.append(event)
+    analyzer.ordered = True
+    if progress:
+        progress(stats.total_lines % PROGRESS_EVERY)
+
+    # Preview pairs, number of redacted lines and per-rule counts, as shown in the UI
+    redaction = {
+        "original": stats.original,
+        "redacted": stats.redacted,
+        "redacted_count": stats.redacted_count,
+        "by_rule": dict(stats.by_rule),
+    }
+    cache_stats = {"classification": analyzer.cache.stats(), "redaction": redact.stats()}
+    return PipelineResult(analyzer.events, dict(stats.error_codes), redaction, stats.total_lines, cache_stats, formats,
+                          total_events)
+
+
+def analyze_upload(ctx, input_path: str, custom_words: List[str], extract_to: Path, max_bytes: Optional[int] = None,
+                   approximate: bool = False) -> Dict:
+    """
+    Background job (see jobs.py): ingest, redact, parse and summarize an upload,
+    reporting progress per stage. With approximate=True the summary comes from
+    sketches built during the pipeline pass instead of exact clustering, and the
+    events are streamed once into the sketch, histogram and fingerprint without being
+    kept, so "events" is empty and memory no longer grows with the number of events.
+    The raw lines are still read per file and kept (memory-mapped when shared) for
+    the ingested-files preview.
+    Returns everything the UI keeps in session state, plus a "dataset" handle (None if
+    the result is not shared). Results are shared through dataset_store, so a bundle that
+    any session already analyzed with the same settings is not processed or stored twice.
+    Uploads over the quota fail with WorkspaceQuotaError, and ingests with unreadable
+    files are not shared, so neither can be served to other sessions.
+    ZIPs are extracted into a directory of their own below extract_to (named after the
+    job), so a cancelled job that is still unwinding never mixes files into a newer one.
+    """
+    store = dataset_store.get_store()
+    ctx.stage("hash")
+    key = dataset_store.dataset_key(input_path, custom_words=custom_words, approximate=approximate)
+    handle = store.acquire(key)
+    if handle is not None:
+        return dict(handle.data, dataset=handle)
+
+    ctx.stage("ingest")
+    job_dir = Path(extract_to) / ctx.job.id
+    try:
+        files = ingestion.ingest(input_path, extract_to=job_dir, max_bytes=max_bytes, check=ctx.check)
+    finally:
+        # Lines are in memory now (or the job failed); the extracted copies are not needed
+        shutil.rmtree(job_dir, ignore_errors=True)
+    # Shared datasets must not reveal the workspace (and so the session) that ingested them
+    files = [(_relative_name(fname, job_dir), content) for fname, content in files]
+    total = sum(len(content) for _, content in files)
+    ctx.advance(total)
+
+    ctx.stage("redact + parse", total=total)
+    analyzer = LogAnalyzer()
+    if approximate:
+        sketch = ApproximateSummary()
+        histogram = timeseries.TimeHistogram()
+        fingerprinter = fingerprint.Fingerprinter()
+        result = run_pipeline(files, custom_words, analyzer, progress=ctx.advance, sketch=sketch,
+                              observers=[histogram.add, fingerprinter.add], keep_events=False)
+        summary = sketch.result()
+        run_fingerprint = fingerprinter.result()
+    else:
+        result = run_pipeline(files, custom_words, analyzer, progress=ctx.advance)
+
+        ctx.stage("summarize", total=result.total_events)
+        summary = analyzer.summary()
+        ctx.advance(result.total_events)
+
+        ctx.stage("histogram", total=result.total_events)
+        histogram = timeseries.TimeHistogram(result.events)
+        ctx.advance(result.total_events)
+
+        ctx.stage("fingerprint", total=result.total_events)
+        run_fingerprint = fingerprint.fingerprint_events(result.events)
+        ctx.advance(result.total_events)
+    data = {
+        "error_codes": result.error_codes,
+        "redaction_preview": result.redaction,
+        "summary": summary,
+        "cluster_rows": views.cluster_rows(summary.get("clusters", [])),
+        "fingerprint": run_fingerprint,
+        "histogram": histogram,
+        "cache_stats": result.cache_stats,
+        "file_formats": result.formats,
+    }
+    if ingestion.has_read_errors(files):
+        # Read errors may be transient, so this result stays private to the session
+        return dict(data, ingested_files=files, events=result.events, dataset=None)
+    # Raw lines move to a memory-mapped file; the store deep-freezes everything else
+    handle = store.put(key, dict(
+        data,
+        ingested_files=tuple((fname, dataset_store.MappedLines(content)) for fname, content in files),
+        events=tuple(result.events),
+    ))
+    return dict(handle.data, dataset=handle)
+
+
+def _relative_name(fname: str, root: Path) -> str:
+    try:
+        return Path(fname).relative_to(root).as_posix()
+    except ValueError:
+        return Path(fname).name
+
+
+def build_reports(ctx, summary: Dict, recs: List[str], test_results: Optional[List[Dict]], metadata: Dict, output_dir: Path) -> Dict:
+    """
+    Background job (see jobs.py): writes the text and PDF reports into output_dir.
+    """
+    from modules import report
+
+    ctx.stage("text report")
+    report.generate_text_report(summary, recs, test_results=test_results, metadata=metadata, output_path=output_dir / "report.txt")
+    ctx.stage("pdf report")
+    report.generate_pdf_report(summary, recs, test_results=test_results, metadata=metadata, output_path=output_dir / "report.pdf")
+    return {"text": output_dir / "report.txt", "pdf": output_dir / "report.pdf"}
@@ -1,19 +1,36 @@
-# Final recommendation.py without emojis and using plain text for compatibility with cp1252 encoding
-from pathlib import Path
-
-recommendation_plain = '''"""
+"""
 recommendations.py – Rule-based recommendation engine for SKC Log Reader
 
 Uses error categories and known error codes to suggest human-readable fixes.
 """
 
-from typing import List, Dict
+import re
+from functools import lru_cache
+from typing import List, Dict, Iterable, Optional
 from modules.error_codes import ERROR_CODES
 
+_CANONICAL_CODES = {code.lower(): code for code in ERROR_CODES}
+
+
+@lru_cache(maxsize=None)
+def error_code_regex() -> re.Pattern:
+    """
+    One case-insensitive pattern for all known codes, compiled on first use.
+    """
+    return re.compile("|".join(re.escape(code) for code in ERROR_CODES), re.IGNORECASE)
+
 
-def generate_recommendations(summary: Dict, raw_logs: List[str]) -> List[str]:
+def find_error_codes(line: str) -> List[str]:
+    """
+    Returns the known error codes that appear in a log line.
+    """
+    return [_CANONICAL_CODES[m.group(0).lower()] for m in error_code_regex().finditer(line)]
+
+
+def generate_recommendations(summary: Dict, raw_logs: Optional[List[str]] = None, error_codes: Optional[Iterable[str]] = None) -> List[str]:
     """
     Returns actionable recommendations based on log summary and content.
+    Pass error_codes (e.g. from pipeline.run_pipeline) to skip rescanning raw_logs.
     """
     recs = []
 
@@ -34,19 +51,13 @@ def generate_recommendations(summary: Dict, raw_logs: List[str]) -> List[str]:
             recs.append(f"{category_map[cat]}")
 
     # Error code-specific recommendations
-    for line in raw_logs:
-        for code, info in ERROR_CODES.items():
-            if code.lower() in line.lower():
-                recs.append(f"Error {code}: {info['meaning']} → Fix: {info['fix']}")
+    if error_codes is None:
+        error_codes = {code for line in raw_logs or [] for code in find_error_codes(line)}
+    for code in error_codes:
+        info = ERROR_CODES[code]
+        recs.append(f"Error {code}: {info['meaning']} → Fix: {info['fix']}")
 
     if not recs:
         recs.append("No known critical issues found. Review anomalies and test plan results for further guidance.")
 
     return list(set(recs))  # De-duplicate
-'''
-
-# Save updated file with safe encoding
-rec_file = Path("/mnt/data/skc_log_reader/modules/recommendations.py")
-rec_file.write_text(recommendation_plain, encoding="utf-8")
-
-rec_file.name
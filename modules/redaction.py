@@ -1,7 +1,4 @@
-from pathlib import Path
-
-# Updated redaction.py with full HP product name support
-updated_redaction_code = '''"""
+"""
 redaction.py – Sensitive data redaction utility for SKC Log Reader
 
 This module identifies and replaces sensitive info in logs like:
@@ -11,44 +8,71 @@ This module identifies and replaces sensitive info in logs like:
 """
 
 import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Tuple
 
 # List of known HP product names (add more as needed)
 HP_PRODUCT_NAMES = [
     "3D Drive Guard", "Active Pen", "Audio Control 2021", "Audio Control 2022", "Blulb Digital Portfolio",
     "Class Room Manager", "Collaboration Keyboard", "Common Access Service layer", "DSO", "E-sign",
     "eAI- Sage", "Easy Clean", "Eco Meter", "Fuild Math", "Hotkeys CWT", "Hotkeys IJWP",
-    "HP thin update 2", "HPQT\\(SA\\)", "Interactive Light", "Omen SDK", "OMEN Light Studio",
+    "HP thin update 2", "HPQT(SA)", "Interactive Light", "Omen SDK", "OMEN Light Studio",
     "Pen SDK", "QuickDrop", "Smart Sense", "Software Control Panel", "Softpaq Downloader",
     "Status App", "System Info App", "TabletButtonService", "Tile", "Touchpoint Customizer",
     "Touchpoint Analytics", "Update Assistant", "Voice Notes", "Wacom Pen", "Windows AutoLaunch",
     "Xpress Keypad", "HP Display Control", "HP Device Access Manager", "HP Hotkeys", "HP Support Assistant"
 ]
 
-# Build a regex pattern to match any product name
-PRODUCT_PATTERN = r"\\b(" + "|".join(re.escape(name) for name in HP_PRODUCT_NAMES) + r")\\b"
+# Build a regex pattern to match any product name (lookarounds instead of \b, so "HPQT(SA)" matches too)
+PRODUCT_PATTERN = r"(?<!\w)(" + "|".join(re.escape(name) for name in HP_PRODUCT_NAMES) + r")(?!\w)"
 
 REDACTION_PATTERNS = {
-    "email": r"[\\w\\.-]+@[\\w\\.-]+",
-    "ip": r"\\b(?:[0-9]{1,3}\\.){3}[0-9]{1,3}\\b",
-    "hostname": r"\\bDESKTOP-[A-Za-z0-9]+\\b",
-    "username": r"\\\\[A-Za-z0-9_-]+",
-    "token": r"(?i)bearer\\s+[a-z0-9\\._\\-]+",
+    "email": r"[\w\.-]+@[\w\.-]+",
+    "ip": r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b",
+    "hostname": r"\bDESKTOP-[A-Za-z0-9]+\b",
+    "username": r"\\[A-Za-z0-9_-]+",
+    "token": r"(?i)bearer\s+[a-z0-9\._\-]+",
     "product": PRODUCT_PATTERN
 }
 
 
+@lru_cache(maxsize=None)
+def compiled_patterns() -> List[Tuple[str, re.Pattern, str]]:
+    """
+    Compiles the redaction rules on first use and keeps them for the life of the process.
+    """
+    return [
+        (key, re.compile(pattern, re.IGNORECASE), f"[REDACTED_{key.upper()}]")
+        for key, pattern in REDACTION_PATTERNS.items()
+    ]
+
+
 def redact_line(line: str, custom: List[str] = []) -> str:
     """
     Redacts sensitive content in a single log line.
     Optionally adds custom keywords to redact.
     """
+    return redact_line_counted(line, custom)[0]
+
+
+def redact_line_counted(line: str, custom: List[str] = []) -> Tuple[str, Dict[str, int]]:
+    """
+    Redacts a single log line and also returns how many matches each rule replaced.
+    Empty custom keywords are ignored.
+    """
     redacted = line
-    for key, pattern in REDACTION_PATTERNS.items():
-        redacted = re.sub(pattern, f"[REDACTED_{key.upper()}]", redacted, flags=re.IGNORECASE)
+    hits = {}
+    for key, pattern, replacement in compiled_patterns():
+        redacted, n = pattern.subn(replacement, redacted)
+        if n:
+            hits[key] = n
     for word in custom:
-        redacted = re.sub(re.escape(word), "[REDACTED_CUSTOM]", redacted, flags=re.IGNORECASE)
-    return redacted
+        if not word:
+            continue
+        redacted, n = re.subn(re.escape(word), "[REDACTED_CUSTOM]", redacted, flags=re.IGNORECASE)
+        if n:
+            hits["custom"] = hits.get("custom", 0) + n
+    return redacted, hits
 
 
 def redact_logs(lines: List[str], custom_words: List[str] = []) -> List[str]:
@@ -68,13 +92,3 @@ def preview_redactions(lines: List[str], custom_words: List[str] = []) -> Dict[s
         "original": original,
         "redacted": redacted
     }
-'''
-
-# Write the updated file
-modules_dir = Path("/mnt/data/skc_log_reader/modules")
-redaction_file = modules_dir / "redaction.py"
-
-with open(redaction_file, "w") as f:
-    f.write(updated_redaction_code)
-
-redaction_file.name
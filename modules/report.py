@@ -1,7 +1,4 @@
-# Create a Streamlit-safe version of report.py using relative paths
-from pathlib import Path
-
-safe_report_code = '''"""
+"""
 report.py – Report generation module for SKC Log Reader
 
 Generates structured, readable reports in text or PDF format
@@ -108,11 +105,3 @@ def generate_pdf_report(summary: Dict, recommendations: List[str], test_results:
             pdf.multi_cell(0, 8, f"Step {step['step_id']} - {step['description']} - Status: {step['status']}")
 
     pdf.output(str(output_path))
-'''
-
-# Save the safe version to correct location
-modules_dir = Path("/mnt/data/skc_log_reader/modules")
-report_file = modules_dir / "report.py"
-report_file.write_text(safe_report_code)
-
-report_file.name
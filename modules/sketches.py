@@ -0,0 +1,227 @@
+"""
+sketches.py – Approximate summaries for very large inputs in SKC Log Reader
+
+Fixed-memory alternatives to the exact counters in analysis.py:
+- Count-min sketch with top-k heavy hitters for category and template counts
+- HyperLogLog for distinct correlation IDs and hosts
+- Reservoir sampling for example lines per category
+Memory does not grow with input size, and every estimate comes with an error bound.
+"""
+
+import math
+import random
+import re
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+from modules.analysis import LogEvent, line_template, gap_anomaly
+
+HOST_RE = re.compile(r"(?:\bhost(?:name)?[:=]\s*([\w.\-]+))|\b(DESKTOP-[A-Za-z0-9]+)\b", re.IGNORECASE)
+MAX_ANOMALIES = 100
+
+
+def _hash64(value: str, seed: int = 0) -> int:
+    digest = hashlib.blake2b(value.encode("utf-8", "ignore"), digest_size=8, salt=seed.to_bytes(8, "little")).digest()
+    return int.from_bytes(digest, "little")
+
+
+class CountMinSketch:
+    """
+    Count-min sketch. Estimates never undercount and overcount by at most
+    epsilon * total with probability 1 - delta.
+    """
+
+    def __init__(self, epsilon: float = 0.001, delta: float = 0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.rows = [[0] * self.width for _ in range(self.depth)]
+        self.total = 0
+
+    def _cells(self, key: str):
+        # Double hashing: row i uses h1 + i * h2
+        h = _hash64(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Adds count to key and returns the new estimate for key.
+        """
+        self.total += count
+        estimate = None
+        for row, cell in zip(self.rows, self._cells(key)):
+            row[cell] += count
+            estimate = row[cell] if estimate is None else min(estimate, row[cell])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[cell] for row, cell in zip(self.rows, self._cells(key)))
+
+    def error_bound(self) -> float:
+        return self.epsilon * self.total
+
+
+class HeavyHitters:
+    """
+    Count-min sketch plus a bounded candidate table of the top-k keys.
+    """
+
+    def __init__(self, k: int = 20, epsilon: float = 0.001, delta: float = 0.01):
+        self.k = k
+        self.sketch = CountMinSketch(epsilon, delta)
+        self.top: Dict[str, int] = {}
+
+    def add(self, key: str) -> None:
+        estimate = self.sketch.add(key)
+        if key in self.top or len(self.top) < self.k:
+            self.top[key] = estimate
+            return
+        smallest = min(self.top, key=self.top.get)
+        if estimate > self.top[smallest]:
+            del self.top[smallest]
+            self.top[key] = estimate
+
+    def items(self) -> List[tuple]:
+        return sorted(self.top.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter with 2^precision registers.
+    Relative standard error is about 1.04 / sqrt(2^precision).
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def add(self, value: str) -> None:
+        h = _hash64(value, seed=1)
+        idx = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def count(self) -> int:
+        raw = self.alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * self.m and zeros:
+            # Small range correction (linear counting)
+            return round(self.m * math.log(self.m / zeros))
+        return round(raw)
+
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+
+class Reservoir:
+    """
+    Uniform reservoir sample of at most `size` items from a stream.
+    """
+
+    def __init__(self, size: int = 5, rng: Optional[random.Random] = None):
+        self.size = size
+        self.seen = 0
+        self.items: List[str] = []
+        self.rng = rng or random.Random(0)
+
+    def add(self, item: str) -> None:
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+        else:
+            j = self.rng.randrange(self.seen)
+            if j < self.size:
+                self.items[j] = item
+
+
+class ApproximateSummary:
+    """
+    Streaming, fixed-memory counterpart of LogAnalyzer.summary().
+    """
+
+    def __init__(self, top_k: int = 20, epsilon: float = 0.001, delta: float = 0.01,
+                 precision: int = 12, samples_per_category: int = 5):
+        self.categories = HeavyHitters(top_k, epsilon, delta)
+        self.templates = HeavyHitters(top_k, epsilon, delta)
+        self.correlation_ids = HyperLogLog(precision)
+        self.hosts = HyperLogLog(precision)
+        self.samples: Dict[str, Reservoir] = {}
+        self.samples_per_category = samples_per_category
+        self.rng = random.Random(0)
+        self.total = 0
+        self.high_severity = 0
+        self.anomalies: List[str] = []
+        self._prev_ts = None
+
+    def add(self, event: LogEvent, count_hosts: bool = True) -> None:
+        """
+        Adds the next event in timeline order. Pass count_hosts=False when host
+        names are fed separately with add_hosts (e.g. from the lines before redaction).
+        """
+        self.total += 1
+        if event.severity >= 4:
+            self.high_severity += 1
+        self.categories.add(event.category)
+        self.templates.add(line_template(event.raw))
+        if event.correlation_id:
+            self.correlation_ids.add(event.correlation_id)
+        if count_hosts:
+            self.add_hosts(event.raw)
+        if event.category not in self.samples:
+            self.samples[event.category] = Reservoir(self.samples_per_category, self.rng)
+        self.samples[event.category].add(event.raw)
+        if event.timestamp and len(self.anomalies) < MAX_ANOMALIES:
+            # Gap detection only needs the previous timestamp
+            message = gap_anomaly(self._prev_ts, event.timestamp) if self._prev_ts else None
+            if message:
+                self.anomalies.append(message)
+            self._prev_ts = event.timestamp
+
+    def add_hosts(self, line: str) -> None:
+        """
+        Counts the host name in a line, in any order. Redaction masks hostnames,
+        so this needs the original line.
+        """
+        host = HOST_RE.search(line)
+        if host:
+            self.hosts.add((host.group(1) or host.group(2)).lower())
+
+    def update(self, events: Iterable[LogEvent]) -> "ApproximateSummary":
+        for event in events:
+            self.add(event)
+        return self
+
+    def result(self) -> Dict:
+        anomalies = list(self.anomalies)
+        if self.high_severity > self.total * 0.4:
+            anomalies.append("⚠️ High proportion of critical errors detected.")
+        return {
+            "approximate": True,
+            "total_events": self.total,
+            "categories": dict(self.categories.items()),
+            "top_templates": self.templates.items(),
+            "distinct_correlation_ids": self.correlation_ids.count(),
+            "distinct_hosts": self.hosts.count(),
+            "samples": {cat: r.items for cat, r in self.samples.items()},
+            "clusters": [],
+            "anomalies": anomalies,
+            "error_bounds": {
+                "count_overestimate_max": round(self.categories.sketch.error_bound(), 2),
+                "count_confidence": 1 - self.categories.sketch.delta,
+                "distinct_relative_error": round(self.correlation_ids.relative_error(), 4),
+            },
+        }
+
+
+def summarize_stream(events: Iterable[LogEvent], **kwargs) -> Dict:
+    """
+    Builds an approximate summary from any event iterable (e.g. timeline.build_timeline)
+    without keeping the events in memory.
+    """
+    return ApproximateSummary(**kwargs).update(events).result()
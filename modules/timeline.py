@@ -0,0 +1,79 @@
+"""
+timeline.py – Cross-file timeline stitching for SKC Log Reader
+
+Each log file is treated as a mostly time-ordered stream:
+- Locally out-of-order lines are fixed with a small bounded reorder buffer
+- Files are stitched together with a heap-based k-way merge (O(n log k))
+- The stitched timeline is a generator, so memory stays bounded by k * buffer_size
+"""
+
+import heapq
+from datetime import datetime
+from itertools import count
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from modules.analysis import LogEvent
+
+DEFAULT_BUFFER_SIZE = 256
+
+
+def sorted_stream(events: Iterable[LogEvent], buffer_size: int = DEFAULT_BUFFER_SIZE) -> Iterator[Tuple[datetime, int, LogEvent]]:
+    """
+    Re-orders a mostly sorted event stream using a bounded min-heap.
+    Untimestamped events inherit the last timestamp seen in the stream so they
+    stay next to the lines around them. Yields (sort_key, sequence, event) tuples.
+    Lines displaced by more than buffer_size positions are emitted as soon as they are seen.
+    """
+    buffer = []
+    seq = count()
+    last_ts = datetime.min
+    for event in events:
+        if event.timestamp:
+            last_ts = event.timestamp
+        heapq.heappush(buffer, (last_ts, next(seq), event))
+        if len(buffer) > buffer_size:
+            yield heapq.heappop(buffer)
+    while buffer:
+        yield heapq.heappop(buffer)
+
+
+def merge_streams(streams: List[Iterator[Tuple[datetime, int, LogEvent]]]) -> Iterator[LogEvent]:
+    """
+    K-way merges sorted per-file streams into one timeline.
+    Ties are broken by file order, then by line order within the file.
+    """
+    keyed = [_keyed(file_idx, stream) for file_idx, stream in enumerate(streams)]
+    for _, _, _, event in heapq.merge(*keyed):
+        yield event
+
+
+def _keyed(file_idx: int, stream: Iterator[Tuple[datetime, int, LogEvent]]) -> Iterator[Tuple[datetime, int, int, LogEvent]]:
+    # A function (not a nested generator expression) so each stream keeps its own file_idx
+    for ts, seq, event in stream:
+        yield ts, file_idx, seq, event
+
+
+def build_timeline(files: Iterable[Tuple[str, Iterable[str]]], parse_line: Callable[[str], LogEvent],
+                   buffer_size: int = DEFAULT_BUFFER_SIZE,
+                   parser_for: Optional[Callable[[str, Iterable[str]], Tuple[Callable[[str], LogEvent], Iterable[str]]]] = None
+                   ) -> Iterator[LogEvent]:
+    """
+    Stitches (filename, lines) pairs into one time-ordered generator of LogEvents.
+    Lines that fail to parse are skipped, as in LogAnalyzer.parse_logs.
+    parser_for, if given, picks the parser for each file: (filename, lines) -> (parse_line, lines).
+    """
+    streams = []
+    for fname, lines in files:
+        parse = parse_line
+        if parser_for:
+            parse, lines = parser_for(fname, lines)
+        streams.append(sorted_stream(_parse_stream(lines, parse), buffer_size))
+    return merge_streams(streams)
+
+
+def _parse_stream(lines: Iterable[str], parse_line: Callable[[str], LogEvent]) -> Iterator[LogEvent]:
+    for line in lines:
+        try:
+            yield parse_line(line)
+        except Exception:
+            continue
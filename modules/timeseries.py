@@ -0,0 +1,167 @@
+"""
+timeseries.py – Precomputed event histograms for SKC Log Reader timeline charts
+
+Events are bucketed once, during or after parsing, into multi-resolution time bins
+by category and severity. Chart series are then cut from the precomputed bins
+and downsampled with LTTB (Largest-Triangle-Three-Buckets) to a fixed number of
+points, so rendering cost does not depend on the number of events.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from modules.analysis import LogEvent
+
+# Bin widths in seconds, finest first
+RESOLUTIONS = [1, 10, 60, 600, 3600, 6 * 3600, 86400]
+MAX_RANGE_BINS = 5000
+DEFAULT_POINTS = 300
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets downsampling. Returns the indices of at most
+    `threshold` points that best preserve the visual shape of the series.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        # Average of the next bucket is the third triangle vertex
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, n)
+        span = max(next_end - next_start, 1)
+        avg_x = sum(xs[next_start:next_end]) / span if next_end > next_start else xs[n - 1]
+        avg_y = sum(ys[next_start:next_end]) / span if next_end > next_start else ys[n - 1]
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+class TimeHistogram:
+    """
+    Sparse event counts per time bin at every resolution in RESOLUTIONS,
+    broken down by category and by severity.
+    """
+
+    def __init__(self, events: Iterable[LogEvent] = ()):
+        # Counts at the finest resolution: _finest[group][key][bin_index] = count
+        self._finest: Dict[str, Dict[str, Dict[int, int]]] = {"category": {}, "severity": {}}
+        self._levels: Optional[Dict[int, Dict[str, Dict[str, Dict[int, int]]]]] = None
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        self.total = 0
+        self._frozen = False
+        for event in events:
+            self.add(event)
+
+    def add(self, event: LogEvent) -> None:
+        """
+        Counts one more event, in any order. Events without a timestamp are skipped.
+        """
+        if self._frozen:
+            raise TypeError("A frozen TimeHistogram cannot be updated")
+        if not event.timestamp:
+            return
+        self.total += 1
+        self.start = event.timestamp if self.start is None else min(self.start, event.timestamp)
+        self.end = event.timestamp if self.end is None else max(self.end, event.timestamp)
+        b = int((event.timestamp - _EPOCH).total_seconds()) // RESOLUTIONS[0]
+        for group, key in (("category", event.category), ("severity", f"severity {event.severity}")):
+            bins = self._finest[group].setdefault(key, {})
+            bins[b] = bins.get(b, 0) + 1
+        self._levels = None
+
+    @property
+    def levels(self) -> Dict[int, Dict[str, Dict[str, Dict[int, int]]]]:
+        """
+        levels[resolution][group][key][bin_index] = count. Coarser levels are rolled
+        up from the finest one on first use after the last add().
+        """
+        if self._levels is None:
+            base = RESOLUTIONS[0]
+            levels = {base: self._finest}
+            for res in RESOLUTIONS[1:]:
+                factor = res // base
+                level = {}
+                for group, keys in self._finest.items():
+                    level[group] = {}
+                    for key, bins in keys.items():
+                        rolled = defaultdict(int)
+                        for b, c in bins.items():
+                            rolled[b // factor] += c
+                        level[group][key] = dict(rolled)
+                levels[res] = level
+            self._levels = levels
+        return self._levels
+
+    def freeze(self) -> "TimeHistogram":
+        """
+        Rolls up every level and makes the histogram read-only, for sharing between
+        sessions (see dataset_store.freeze). Returns the histogram itself.
+        """
+        from modules.dataset_store import freeze
+
+        self._levels = freeze(self.levels)
+        self._finest = self._levels[RESOLUTIONS[0]]
+        self._frozen = True
+        return self
+
+    def resolution_for(self, start: datetime, end: datetime) -> int:
+        """
+        Finest resolution that covers the range in at most MAX_RANGE_BINS bins.
+        """
+        span = max((end - start).total_seconds(), 1)
+        for res in RESOLUTIONS:
+            if span / res <= MAX_RANGE_BINS:
+                return res
+        return RESOLUTIONS[-1]
+
+    def series(self, by: str = "category", start: Optional[datetime] = None, end: Optional[datetime] = None,
+               max_points: int = DEFAULT_POINTS) -> Dict[str, List]:
+        """
+        Chart-ready series for a time range: {"time": [...], key: [counts], ...}.
+        All keys share one set of at most max_points bins and report their exact counts
+        there: each key is LTTB-downsampled to an equal share of max_points and the
+        shares are merged. With too many keys for a useful share, the bins are chosen
+        by LTTB over the total count instead.
+        """
+        if self.start is None:
+            return {"time": []}
+        start = start or self.start
+        end = end or self.end
+        res = self.resolution_for(start, end)
+        first = int((start - _EPOCH).total_seconds()) // res
+        last = int((end - _EPOCH).total_seconds()) // res
+        xs = list(range(first, last + 1))
+
+        dense = {}
+        for key, bins in self.levels[res][by].items():
+            dense[key] = [bins.get(b, 0) for b in xs]
+
+        share = max_points // max(len(dense), 1)
+        if len(xs) <= max_points:
+            idx = list(range(len(xs)))
+        elif share >= 3:
+            idx = sorted({i for ys in dense.values() for i in lttb(xs, ys, share)})
+        else:
+            idx = lttb(xs, [sum(counts) for counts in zip(*dense.values())], max_points)
+        result = {"time": [_EPOCH + timedelta(seconds=xs[i] * res) for i in idx]}
+        for key, ys in dense.items():
+            result[key] = [ys[i] for i in idx]
+        return result
@@ -0,0 +1,73 @@
+"""
+views.py – Lightweight display views for SKC Log Reader
+
+Builds compact, precomputed rows for the UI panels so that each Streamlit
+rerun only sends the page that is actually displayed:
+- Cluster overview rows (no per-event timestamp lists)
+- Test plan step rows with match counts
+"""
+
+import math
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 25
+
+
+def page_count(total: int, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """
+    Number of pages needed to show `total` items (at least 1).
+    """
+    return max(1, math.ceil(total / page_size))
+
+
+def paginate(items: Sequence, page: int, page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[Sequence, int]:
+    """
+    Returns (items on the given 1-based page, total page count).
+    Out-of-range pages are clamped.
+    """
+    pages = page_count(len(items), page_size)
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], pages
+
+
+def cluster_rows(clusters: List[Dict]) -> List[Dict]:
+    """
+    Aggregates each cluster into a single display row, dropping the full timestamp list.
+    Clusters that are already compact (start/end instead of timestamps, see
+    partial_summary.py) are accepted too.
+    """
+    rows = []
+    for i, cluster in enumerate(clusters, start=1):
+        if "timestamps" in cluster:
+            timestamps = cluster["timestamps"] or []
+            start = min(timestamps) if timestamps else None
+            end = max(timestamps) if timestamps else None
+        else:
+            start, end = cluster.get("start"), cluster.get("end")
+        rows.append({
+            "cluster": i,
+            "category": cluster.get("category"),
+            "count": cluster.get("count", 0),
+            "start": str(start) if start else "",
+            "end": str(end) if end else "",
+            "duration_s": int((end - start).total_seconds()) if start else 0,
+            "sample": cluster.get("sample", "")[:200],
+        })
+    return rows
+
+
+def test_result_rows(results: List[Dict]) -> List[Dict]:
+    """
+    One row per test plan step with the number of matching log lines instead of the lines themselves.
+    """
+    return [
+        {
+            "step_id": r.get("step_id"),
+            "description": r.get("description"),
+            "required": r.get("required"),
+            "status": r.get("status"),
+            "matches": len(r.get("matched_logs", [])),
+        }
+        for r in results
+    ]
@@ -0,0 +1,148 @@
+"""
+workspace.py – Per-session upload workspaces for SKC Log Reader
+
+Gives every Streamlit session its own directory so concurrent analysts never
+share temp files:
+- Uploads are streamed to disk in fixed-size chunks (no second in-memory copy)
+- Per-session and server-wide disk quotas are enforced while writing
+- Idle workspaces are removed after a TTL, and explicitly on logout/reset
+"""
+
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+WORKSPACE_ROOT = Path("workspaces")
+CHUNK_SIZE = 1024 * 1024
+SESSION_QUOTA_BYTES = 2 * 1024 ** 3
+TOTAL_QUOTA_BYTES = 20 * 1024 ** 3
+SESSION_TTL_S = 4 * 3600
+SWEEP_INTERVAL_S = 300
+
+_HEARTBEAT = ".last_seen"
+_last_sweep = 0.0
+
+
+class WorkspaceQuotaError(Exception):
+    """
+    Raised when an upload would exceed the session or server disk quota.
+    """
+
+
+def directory_size(path: Path) -> int:
+    """
+    Total size in bytes of all files below a directory.
+    """
+    if not path.exists():
+        return 0
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+class Workspace:
+    def __init__(self, session_id: Optional[str] = None, root: Path = WORKSPACE_ROOT,
+                 quota_bytes: int = SESSION_QUOTA_BYTES, total_quota_bytes: int = TOTAL_QUOTA_BYTES):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.root = root
+        self.path = root / self.session_id
+        self.quota_bytes = quota_bytes
+        self.total_quota_bytes = total_quota_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.touch()
+
+    @property
+    def upload_dir(self) -> Path:
+        return self.path / "uploads"
+
+    @property
+    def extract_dir(self) -> Path:
+        return self.path / "extracted"
+
+    def touch(self) -> None:
+        """
+        Marks the workspace as in use so the expiry sweep keeps it.
+        """
+        (self.path / _HEARTBEAT).touch()
+
+    def remaining_bytes(self) -> int:
+        """
+        Bytes this session may still write, bounded by both quotas.
+        """
+        session_left = self.quota_bytes - directory_size(self.path)
+        total_left = self.total_quota_bytes - directory_size(self.root)
+        return max(0, min(session_left, total_left))
+
+    def save_upload(self, fileobj: BinaryIO, filename: str, chunk_size: int = CHUNK_SIZE) -> Path:
+        """
+        Streams an uploaded file into the workspace chunk by chunk and returns its path.
+        Raises WorkspaceQuotaError (and removes the partial file) if a quota is exceeded.
+        """
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        target = self.upload_dir / Path(filename).name
+        budget = self.remaining_bytes()
+        written = 0
+        try:
+            with open(target, "wb") as f:
+                while True:
+                    chunk = fileobj.read(chunk_size)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > budget:
+                        raise WorkspaceQuotaError(
+                            f"Upload exceeds the available workspace quota ({budget // (1024 * 1024)} MB left)."
+                        )
+                    f.write(chunk)
+        except Exception:
+            target.unlink(missing_ok=True)
+            raise
+        self.touch()
+        return target
+
+    def reset(self) -> None:
+        """
+        Removes previous uploads and extracted files, keeping the workspace itself.
+        """
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+        shutil.rmtree(self.extract_dir, ignore_errors=True)
+        self.touch()
+
+    def destroy(self) -> None:
+        """
+        Deletes the whole workspace directory (e.g. on logout).
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def cleanup_expired(root: Path = WORKSPACE_ROOT, ttl_s: int = SESSION_TTL_S) -> int:
+    """
+    Deletes workspaces whose sessions have been idle for longer than ttl_s.
+    Returns the number of workspaces removed.
+    """
+    if not root.exists():
+        return 0
+    removed = 0
+    cutoff = time.time() - ttl_s
+    for ws in root.iterdir():
+        if not ws.is_dir():
+            continue
+        heartbeat = ws / _HEARTBEAT
+        last_seen = heartbeat.stat().st_mtime if heartbeat.exists() else ws.stat().st_mtime
+        if last_seen < cutoff:
+            shutil.rmtree(ws, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def sweep_expired(root: Path = WORKSPACE_ROOT, ttl_s: int = SESSION_TTL_S) -> int:
+    """
+    Runs cleanup_expired at most once per SWEEP_INTERVAL_S per process.
+    Streamlit has no session-end hook, so expiry is how abandoned sessions get cleaned up.
+    """
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < SWEEP_INTERVAL_S:
+        return 0
+    _last_sweep = now
+    return cleanup_expired(root, ttl_s)
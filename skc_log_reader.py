@@ -12,12 +12,22 @@ Includes:
 """
 
 import streamlit as st
-from modules import (
-    ingestion, redaction, analysis, test_plan,
-    recommendations, report, ai_rca, auth, history
-)
+from modules import auth, history, views, workspace, jobs
+from modules.lazy import lazy_import
+
+# Subsystems below are imported on first use, not on every cold start
+analysis = lazy_import("modules.analysis")
+test_plan = lazy_import("modules.test_plan")
+recommendations = lazy_import("modules.recommendations")
+ai_rca = lazy_import("modules.ai_rca")
+pipeline = lazy_import("modules.pipeline")
+fingerprint = lazy_import("modules.fingerprint")
+timeseries = lazy_import("modules.timeseries")
+pd = lazy_import("pandas")
 import json
 import os
+import re
+import time
 
 st.set_page_config(page_title="SKC Log Analyzer", layout="wide")
 
@@ -42,64 +52,158 @@ if AUTH_ENABLED:
     else:
         st.sidebar.success("Logged in as: " + creds["username"])
         if st.sidebar.button("Logout"):
+            if st.session_state.get("workspace_id"):
+                workspace.Workspace(st.session_state["workspace_id"]).destroy()
             st.session_state.clear()
             st.experimental_rerun()
 
 # --- STATE INIT ---
 for key in [
-    "log_lines", "redacted_lines", "events", "summary", "test_plan_results",
+    "events", "error_codes", "summary", "test_plan_results",
     "recommendations", "plan_refresh", "ai_rca_prompt", "ingested_files",
-    "project_name", "app_name", "build_version", "test_type"
+    "project_name", "app_name", "build_version", "test_type",
+    "redaction_preview", "cluster_rows", "test_plan_key", "fingerprint", "histogram", "cache_stats",
+    "file_formats", "dataset", "saved_run_ids"
 ]:
     if key not in st.session_state:
         st.session_state[key] = None
 
+# Each session uploads into its own workspace directory; idle ones expire.
+# The workspace ID is kept in the URL so a reloaded page can reattach to it and its jobs.
+# st.query_params replaced the experimental query-param functions in Streamlit 1.30
+QUERY_PARAMS = getattr(st, "query_params", None)
+if not st.session_state.get("workspace_id"):
+    if QUERY_PARAMS is not None:
+        ws_param = QUERY_PARAMS.get("ws")
+    else:
+        ws_param = st.experimental_get_query_params().get("ws", [None])[0]
+    if ws_param and re.fullmatch(r"[0-9a-f]{32}", ws_param) and (workspace.WORKSPACE_ROOT / ws_param).exists():
+        st.session_state["workspace_id"] = ws_param
+ws = workspace.Workspace(st.session_state.get("workspace_id"))
+st.session_state["workspace_id"] = ws.session_id
+if QUERY_PARAMS is not None:
+    QUERY_PARAMS["ws"] = ws.session_id
+else:
+    st.experimental_set_query_params(ws=ws.session_id)
+workspace.sweep_expired()
+manager = jobs.get_manager()
+refresh_pending = False
+
+# Derived state that must be recomputed when new logs are loaded
+DERIVED_KEYS = ["summary", "test_plan_results", "recommendations", "cluster_rows", "test_plan_key"]
+
+
+def paged(items, key, page_size=views.DEFAULT_PAGE_SIZE):
+    """
+    Renders a page selector and returns only the items on the selected page.
+    """
+    pages = views.page_count(len(items), page_size)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=key) if pages > 1 else 1
+    rows, _ = views.paginate(items, page, page_size)
+    return rows
+
+
+def current_job(name):
+    """
+    Returns this workspace's latest job of the given kind, reattaching after a page reload.
+    """
+    job = manager.get(st.session_state.get(f"{name}_job_id"), owner=ws.session_id)
+    if job is None:
+        owned = [j for j in manager.jobs_for(ws.session_id) if j.name == name]
+        job = max(owned, key=lambda j: j.created) if owned else None
+    st.session_state[f"{name}_job_id"] = job.id if job else None
+    return job
+
+
+def show_job_progress(job):
+    """
+    Renders per-stage progress and a cancel button for a running job.
+    """
+    for stage in job.snapshot()["stages"]:
+        if stage["total"]:
+            st.progress(min(1.0, stage["lines"] / max(stage["total"], 1)))
+        st.caption(f"{stage['stage']}: {stage['lines']:,} lines in {stage['seconds']}s ({stage['lines_per_s']:,} lines/s)")
+    if st.button("Cancel", key=f"cancel_{job.id}"):
+        job.cancel()
+
 # --- TABS ---
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["Upload Logs", "Test Plan", "Analysis", "Recommendations", "Report"])
 
 # --- TAB 1: UPLOAD ---
 with tab1:
     st.header("📁 Upload and Redact Logs")
-    uploaded_file = st.file_uploader("Upload .log/.txt/.zip file", type=["zip", "txt", "log", "json"])
-    custom_words = st.text_input("Custom redaction keywords (comma-separated)").split(",")
+    uploaded_file = st.file_uploader("Upload .log/.txt/.evtx/.zip file", type=["zip", "txt", "log", "json", "evtx"])
+    custom_words = [w.strip() for w in st.text_input("Custom redaction keywords (comma-separated)").split(",") if w.strip()]
+    approximate = st.checkbox("Approximate summary (sketch estimates of top templates and distinct hosts/IDs, with error bounds)")
 
     col1, col2 = st.columns(2)
     with col1:
         if uploaded_file and st.button("Ingest and Redact"):
-            temp_path = "temp.zip" if uploaded_file.name.endswith(".zip") else "temp.log"
-            with open(temp_path, "wb") as f:
-                f.write(uploaded_file.read())
-
-            with st.spinner("🔄 Ingesting and redacting logs..."):
-                files = ingestion.ingest(temp_path)
-                lines = [line for _, content in files for line in content]
-                redacted = redaction.redact_logs(lines, custom_words)
-                st.session_state["log_lines"] = lines
-                st.session_state["redacted_lines"] = redacted
-                st.session_state["ingested_files"] = files
-                history.log_event("log_uploaded", {"filename": uploaded_file.name})
+            previous = current_job("ingest")
+            if previous and previous.active:
+                previous.cancel()
+            ws.reset()
+            try:
+                temp_path = ws.save_upload(uploaded_file, uploaded_file.name)
+            except workspace.WorkspaceQuotaError as e:
+                st.error(f"❌ {e}")
+                st.stop()
 
+            # Ingest, redact and parse in the background so the UI stays responsive
+            job = manager.submit(
+                pipeline.analyze_upload, str(temp_path), custom_words, ws.extract_dir, ws.remaining_bytes(),
+                approximate=approximate, owner=ws.session_id, name="ingest"
+            )
+            st.session_state["ingest_job_id"] = job.id
+            history.log_event("log_uploaded", {"filename": uploaded_file.name})
+
+        ingest_job = current_job("ingest")
+        if ingest_job and ingest_job.active:
+            st.info("🔄 Ingesting and redacting logs...")
+            show_job_progress(ingest_job)
+            refresh_pending = True
+        elif ingest_job and ingest_job.status == jobs.DONE:
+            for key, value in ingest_job.result.items():
+                st.session_state[key] = value
+            for key in ["test_plan_results", "recommendations", "test_plan_key", "saved_run_ids"]:
+                st.session_state[key] = None
+            manager.forget(ingest_job.id)
             st.success("✅ Logs redacted and loaded. Proceed to Analysis.")
+        elif ingest_job:
+            st.error("❌ Ingestion was cancelled." if ingest_job.status == jobs.CANCELLED else f"❌ Ingestion failed: {ingest_job.error}")
+            manager.forget(ingest_job.id)
 
     with col2:
         if st.button("Clear Logs"):
-            for key in ["log_lines", "redacted_lines", "events", "summary", "test_plan_results", "recommendations", "ai_rca_prompt", "ingested_files"]:
+            running = current_job("ingest")
+            if running and running.active:
+                running.cancel()
+            ws.reset()
+            for key in ["events", "error_codes", "ai_rca_prompt", "ingested_files", "redaction_preview", "fingerprint", "histogram", "cache_stats", "file_formats", "dataset", "saved_run_ids"] + DERIVED_KEYS:
                 st.session_state[key] = None
             st.success("Session reset. You may re-upload logs.")
 
     if st.session_state["ingested_files"]:
         st.subheader("📂 Ingested Files Preview")
+        formats = st.session_state["file_formats"] or {}
         for fname, content in st.session_state["ingested_files"][:3]:
-            with st.expander(f"{fname}"):
+            with st.expander(f"{fname} ({formats.get(fname, 'generic')})" if formats else f"{fname}"):
                 st.code("".join(content[:50]), language="text")
 
-    if st.session_state["redacted_lines"]:
+    if st.session_state["redaction_preview"]:
         st.subheader("🔍 Redaction Preview")
-        preview = redaction.preview_redactions(st.session_state["log_lines"], custom_words)
+        preview = st.session_state["redaction_preview"]
         for o, r in zip(preview["original"], preview["redacted"]):
             st.markdown(f"• **Original:** `{o.strip()}`")
             st.markdown(f"• **Redacted:** `{r.strip()}`")
-        st.info(f"Total redacted lines: {sum(1 for o, r in zip(st.session_state['log_lines'], st.session_state['redacted_lines']) if o != r)}")
+        st.info(f"Total redacted lines: {preview['redacted_count']}")
+        if preview.get("by_rule"):
+            st.caption(", ".join(f"{rule}: {n}" for rule, n in preview["by_rule"].items()))
+        if st.session_state["cache_stats"]:
+            # Caches that were never consulted (e.g. classification for .evtx files) are left out
+            rates = {name: s["hit_rate"] for name, s in st.session_state["cache_stats"].items() if s["hits"] + s["misses"]}
+            if rates:
+                st.caption("Repeated-line cache hit rate: " + ", ".join(f"{name} {rate:.0%}" for name, rate in rates.items()))
 
 # --- TAB 2: TEST PLAN ---
 with tab2:
@@ -125,32 +229,109 @@ with tab2:
         except Exception as e:
             st.error(f"Error reading plan: {e}")
 
-    if selected != "--" and st.session_state["redacted_lines"]:
-        plan_obj = test_plan.load_test_plan(f"test_plans/{selected}")
-        parsed = analysis.LogAnalyzer().parse_logs(st.session_state["redacted_lines"])
-        results = test_plan.validate_test_plan(plan_obj, parsed)
-        st.session_state["test_plan_results"] = results
+    if selected != "--" and (st.session_state["summary"] or {}).get("approximate"):
+        st.info("ℹ️ Approximate mode does not keep individual events. Re-ingest without it to validate a test plan.")
+    elif selected != "--" and st.session_state["events"] is not None:
+        if st.session_state["test_plan_key"] != selected:
+            plan_obj = test_plan.load_test_plan(f"test_plans/{selected}")
+            st.session_state["test_plan_results"] = test_plan.validate_test_plan(plan_obj, st.session_state["events"])
+            st.session_state["test_plan_key"] = selected
+        results = st.session_state["test_plan_results"]
         st.subheader("✅ Test Plan Results")
-        st.json(results)
+        st.dataframe(views.test_result_rows(results))
+        for r in results:
+            if r["matched_logs"]:
+                with st.expander(f"Matched logs for {r['step_id']} ({len(r['matched_logs'])})"):
+                    st.code("\n".join(paged(r["matched_logs"], key=f"plan_page_{r['step_id']}")), language="text")
 
 # --- TAB 3: ANALYSIS ---
 with tab3:
     st.header("📊 Log Analysis Summary")
-    if st.session_state["redacted_lines"]:
-        analyzer = analysis.LogAnalyzer()
-        events = analyzer.parse_logs(st.session_state["redacted_lines"])
-        summary = analyzer.summary()
-        st.session_state["events"] = events
-        st.session_state["summary"] = summary
+    if st.session_state["events"] is not None:
+        # Only re-analyze when new logs were loaded
+        if st.session_state["summary"] is None:
+            # Events come out of the pipeline already in timeline order
+            analyzer = analysis.LogAnalyzer(st.session_state["events"], ordered=True)
+            st.session_state["summary"] = analyzer.summary()
+            st.session_state["cluster_rows"] = views.cluster_rows(st.session_state["summary"].get("clusters", []))
+        summary = st.session_state["summary"]
 
         st.metric("Total Events", summary.get("total_events", 0))
+        if summary.get("approximate"):
+            bounds = summary["error_bounds"]
+            st.caption(
+                f"Approximate counts: overestimated by at most {bounds['count_overestimate_max']} "
+                f"with {bounds['count_confidence']:.0%} confidence; distinct counts within "
+                f"±{bounds['distinct_relative_error']:.1%}."
+            )
+            col1, col2 = st.columns(2)
+            col1.metric("Distinct Correlation IDs (est.)", summary["distinct_correlation_ids"])
+            col2.metric("Distinct Hosts (est.)", summary["distinct_hosts"])
         st.subheader("Categories")
         st.json(summary.get("categories", {}))
+        if summary.get("approximate"):
+            st.subheader("Top Templates")
+            for template, count in summary["top_templates"]:
+                st.markdown(f"- `{template}` ({count})")
+            st.subheader("Sample Lines")
+            st.json(summary["samples"])
+        st.subheader("📈 Timeline")
+        if st.session_state["histogram"] is None:
+            st.session_state["histogram"] = timeseries.TimeHistogram(st.session_state["events"])
+        hist = st.session_state["histogram"]
+        if hist.start is not None and hist.end > hist.start:
+            group_by = st.radio("Group by", ["category", "severity"], horizontal=True)
+            window = st.slider("Time range", min_value=hist.start, max_value=hist.end, value=(hist.start, hist.end))
+            series = hist.series(group_by, *window)
+            st.caption(f"{hist.resolution_for(*window)}s bins · {len(series['time'])} points shown for {hist.total:,} events")
+            st.line_chart(pd.DataFrame(series).set_index("time"))
+        else:
+            st.caption("Not enough timestamped events for a timeline.")
+
         st.subheader("Anomalies")
-        for a in summary.get("anomalies", []):
+        for a in paged(summary.get("anomalies", []), key="anomaly_page"):
             st.markdown(f"- {a}")
         st.subheader("Clusters")
-        st.json(summary.get("clusters", []))
+        cluster_rows = st.session_state["cluster_rows"]
+        st.caption(f"{len(cluster_rows)} clusters")
+        st.dataframe(paged(cluster_rows, key="cluster_page"))
+
+        with st.expander("🔁 Compare with a previous build"):
+            if st.session_state["fingerprint"] is None:
+                st.session_state["fingerprint"] = fingerprint.fingerprint_events(st.session_state["events"])
+            current_fp = st.session_state["fingerprint"]
+            if st.button("Save this run for future comparisons"):
+                run_id = fingerprint.save_fingerprint(current_fp, {
+                    "project_name": st.session_state["project_name"],
+                    "app_name": st.session_state["app_name"],
+                    "build_version": st.session_state["build_version"],
+                    "test_type": st.session_state["test_type"]
+                })
+                # Saved copies of this run must not be picked as its own nearest baseline
+                st.session_state["saved_run_ids"] = (st.session_state["saved_run_ids"] or []) + [run_id]
+                st.success("✅ Run fingerprint saved.")
+            runs = fingerprint.load_fingerprints()
+            if runs:
+                labels = {
+                    f"{r['metadata'].get('build_version') or 'unknown build'} – {r['metadata'].get('app_name') or ''} ({r['timestamp'][:16]})": r
+                    for r in reversed(runs)
+                }
+                choice = st.selectbox("Compare against", ["Nearest similar run"] + list(labels))
+                if choice == "Nearest similar run":
+                    baseline = fingerprint.nearest_run(current_fp, runs, exclude=st.session_state["saved_run_ids"] or [])
+                else:
+                    baseline = labels[choice]
+                if baseline is None:
+                    st.info("No other saved runs yet. Save runs of other builds to compare against them.")
+                else:
+                    diff = fingerprint.diff_fingerprints(current_fp, baseline["fingerprint"])
+                    st.caption(f"Baseline build {baseline['metadata'].get('build_version') or 'unknown'} · template similarity {diff['similarity']:.0%}")
+                    for title, key in [("🆕 New errors", "new"), ("📈 Spiking errors", "spiking"), ("✅ Vanished errors", "vanished")]:
+                        st.markdown(f"**{title}** ({len(diff[key])})")
+                        if diff[key]:
+                            st.dataframe(paged(diff[key], key=f"diff_page_{key}"))
+            else:
+                st.info("No saved runs yet. Save this run to compare future builds against it.")
     else:
         st.warning("Please upload and ingest logs first.")
 
@@ -158,8 +339,7 @@ with tab3:
 with tab4:
     st.header("🛠 Recommendations and RCA")
     if st.session_state["summary"]:
-        raw = st.session_state["log_lines"]
-        recs = recommendations.generate_recommendations(st.session_state["summary"], raw)
+        recs = recommendations.generate_recommendations(st.session_state["summary"], error_codes=st.session_state["error_codes"])
         st.session_state["recommendations"] = recs
 
         st.subheader("Rule-Based Recommendations")
@@ -171,7 +351,11 @@ with tab4:
         if st.text_input("OpenAI API Key", type="password"):
             st.caption("Only needed if using GPT")
         if st.button("Generate RCA"):
-            errors = [e.raw for e in st.session_state["events"] if e.severity >= 4]
+            if st.session_state["summary"].get("approximate"):
+                # No events are kept in approximate mode; the sampled lines stand in for them
+                errors = [line for lines in st.session_state["summary"]["samples"].values() for line in lines]
+            else:
+                errors = [e.raw for e in st.session_state["events"] if e.severity >= 4]
             metadata = {
                 "app_name": st.text_input("App Name", "DemoApp"),
                 "build_version": st.text_input("Build Version", "1.0"),
@@ -191,32 +375,40 @@ with tab5:
     st.text_input("Test Type", key="test_type")
 
     if st.button("Generate Report") and st.session_state["summary"] and st.session_state["recommendations"]:
-        report.generate_text_report(
-            st.session_state["summary"],
-            st.session_state["recommendations"],
-            test_results=st.session_state.get("test_plan_results"),
-            metadata={
-                "project_name": st.session_state["project_name"],
-                "app_name": st.session_state["app_name"],
-                "build_version": st.session_state["build_version"],
-                "test_type": st.session_state["test_type"]
-            }
-        )
-        report.generate_pdf_report(
+        job = manager.submit(
+            pipeline.build_reports,
             st.session_state["summary"],
             st.session_state["recommendations"],
-            test_results=st.session_state.get("test_plan_results"),
-            metadata={
+            st.session_state.get("test_plan_results"),
+            {
                 "project_name": st.session_state["project_name"],
                 "app_name": st.session_state["app_name"],
                 "build_version": st.session_state["build_version"],
                 "test_type": st.session_state["test_type"]
-            }
+            },
+            ws.path,
+            owner=ws.session_id, name="report"
         )
+        st.session_state["report_job_id"] = job.id
+
+    report_job = current_job("report")
+    if report_job and report_job.active:
+        st.info("🔄 Generating report...")
+        show_job_progress(report_job)
+        refresh_pending = True
+    elif report_job:
+        if report_job.status == jobs.FAILED:
+            st.error(f"❌ Report generation failed: {report_job.error}")
+        manager.forget(report_job.id)
 
-    if os.path.exists("data/report.txt"):
-        with open("data/report.txt", "r") as f:
+    if os.path.exists(ws.path / "report.txt"):
+        with open(ws.path / "report.txt", "r") as f:
             st.download_button("⬇️ Download Text Report", f.read(), file_name="report.txt")
-    if os.path.exists("data/report.pdf"):
-        with open("data/report.pdf", "rb") as f:
+    if os.path.exists(ws.path / "report.pdf"):
+        with open(ws.path / "report.pdf", "rb") as f:
             st.download_button("⬇️ Download PDF Report", f, file_name="report.pdf")
+
+# Poll running jobs: rerun once the rest of the page has rendered
+if refresh_pending:
+    time.sleep(1)
+    st.rerun()
@@ -0,0 +1,58 @@
+"""
+Tests for dataset_store.py: shared datasets are deep-frozen, so one session
+cannot change what another session sees.
+"""
+
+import copy
+import json
+from datetime import datetime
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from modules.analysis import LogEvent
+from modules.dataset_store import DatasetStore, MappedLines
+from modules.timeseries import TimeHistogram
+
+
+def make_dataset():
+    events = [LogEvent(datetime(2024, 3, 1, 8, 0, s), f"line {s}", "ERROR", "Failure", 4, None) for s in range(3)]
+    return {
+        "events": tuple(events),
+        "summary": {"total_events": 3, "categories": {"Failure": 3}, "clusters": [{"count": 3, "timestamps": []}]},
+        "histogram": TimeHistogram(events),
+        "ingested_files": (("a.log", MappedLines(["line 0\n", "line 1\n"])),),
+    }
+
+
+def test_shared_values_are_read_only():
+    store = DatasetStore()
+    data = store.put("key", make_dataset()).data
+    summary = data["summary"]
+    with pytest.raises(TypeError):
+        summary["total_events"] = 0
+    with pytest.raises(TypeError):
+        summary["categories"].update(Other=1)
+    with pytest.raises(AttributeError):
+        summary["clusters"].append({})
+    with pytest.raises(FrozenInstanceError):
+        data["events"][0].category = "Other"
+    with pytest.raises(TypeError):
+        data["histogram"].add(data["events"][0])
+    assert data["ingested_files"][0][1][1] == "line 1\n"
+
+
+def test_sessions_get_their_own_top_level_dict():
+    store = DatasetStore()
+    first = store.put("key", make_dataset()).data
+    first["summary"] = {"replaced": True}
+    assert store.acquire("key").data["summary"]["total_events"] == 3
+
+
+def test_frozen_values_serialize_and_copy_like_plain_ones():
+    summary = DatasetStore().put("key", make_dataset()).data["summary"]
+    assert json.loads(json.dumps(summary)) == {"total_events": 3, "categories": {"Failure": 3},
+                                               "clusters": [{"count": 3, "timestamps": []}]}
+    thawed = copy.deepcopy(summary)
+    thawed["total_events"] = 0
+    assert summary["total_events"] == 3
@@ -0,0 +1,53 @@
+"""
+Tests for evtx.py against tests/fixtures/System.evtx: 60 System/Application
+events in two chunks, stored in wrapped-around order (the chunk holding
+records 41-60 comes first in the file, as after log rotation).
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from modules import evtx, parsers
+from modules.analysis import LogAnalyzer
+
+FIXTURE = Path(__file__).parent / "fixtures" / "System.evtx"
+
+
+def test_records_stream_in_record_order():
+    records = list(evtx.iter_records(FIXTURE, workers=1))
+    assert [r.record_id for r in records] == list(range(1, 61))
+
+
+def test_record_fields():
+    first = next(evtx.iter_records(FIXTURE, workers=1))
+    assert first.timestamp == datetime(2024, 3, 1, 8, 0, 1, 339563)
+    assert (first.provider, first.event_id, first.level) == ("Application Error", 1000, "ERROR")
+    assert (first.channel, first.computer) == ("Application", "PC-0002.corp.example")
+    assert first.data == [("AppName", "HPAudioSwitch.exe"), ("AppVersion", "1.0.0.0"), ("ExceptionCode", "c0000005")]
+
+
+def test_process_pool_matches_in_process(monkeypatch):
+    monkeypatch.setattr(evtx, "PARALLEL_MIN_CHUNKS", 1)
+    assert list(evtx.iter_records(FIXTURE, workers=2)) == list(evtx.iter_records(FIXTURE, workers=1))
+
+
+def test_rendered_lines_are_sniffed_and_classified():
+    lines = evtx.read_lines(FIXTURE)
+    assert lines[-1] == ("2024-03-01 10:05:39 ERROR [Service Control Manager] EventID=7000 Channel=System "
+                         "Computer=PC-0000.corp.example param1=Print Spooler param2=5\n")
+    fmt, parse = parsers.parser_for("System.evtx", lines[:parsers.SNIFF_LINES], LogAnalyzer())
+    assert fmt == "evtx"
+    events = {(e.event_id, e.level): (e.category, e.severity) for e in map(parse, lines)}
+    assert events[1000, "ERROR"] == ("Crash", 5)
+    assert events[7031, "ERROR"] == ("ServiceFailure", 4)
+    assert events[7036, "INFO"] == ("Other", 1)
+    assert events[16, "INFO"] == ("Other", 1)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.evtx"
+    path.write_bytes(b"plain text\n" * 1000)
+    with pytest.raises(ValueError):
+        list(evtx.iter_records(path))
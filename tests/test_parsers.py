@@ -0,0 +1,120 @@
+"""
+Tests for parsers.py: format sniffing and parsing of Windows servicing logs,
+and encoding sniffing of the files they come in (through ingestion.py).
+"""
+
+import codecs
+from datetime import datetime
+
+import pytest
+
+from modules import ingestion, parsers
+from modules.analysis import LogAnalyzer
+
+CBS = [
+    "2024-03-01 08:00:01, Info                  CBS    Starting TrustedInstaller initialization.\n",
+    "2024-03-01 08:00:02, Info                  CSI    00000001 Failed to get status, hr = 0x80070002\n",
+    "2024-03-01 08:00:03, Error                 CBS    Failed to resolve package [HRESULT = 0x800f0831]\n",
+]
+DISM = [
+    "2024-03-01 09:00:00, Info                  DISM   DISM.EXE: Executing command line: dism /online\n",
+    "2024-03-01 09:00:05, Error                 DISM   DISM Package Manager: Failed finalizing changes.\n",
+]
+SETUPAPI = [
+    "[Device Install Log]\n",
+    ">>>  [Device Install (Hardware initiated) - USB\\VID_03F0&PID_0A4A]\n",
+    ">>>  Section start 2024/03/01 10:15:30.123\n",
+    "     ndv: Installing device...\n",
+    "!!!  dvi: Device not started: Device has problem: 0x0a: CM_PROB_FAILED_START.     10:15:31.500\n",
+    "<<<  Section end 2024/03/01 10:15:32.000\n",
+    "<<<  [Exit status: FAILURE(0xe0000219)]\n",
+]
+WINDOWS_UPDATE = [
+    "2024/03/01 11:00:00.1234567 1234  5678  Agent           WU client version 10.0.19041.3636\n",
+    "2024/03/01 11:00:01.0000000 1234  5678  Agent           WARNING: Send failed with hr = 80072ee2.\n",
+    "2024/03/01 11:00:02.5000000 1234  5678  Handler         FATAL: Install failed, error 0x80070643\n",
+]
+WINDOWS_UPDATE_LEGACY = [
+    "2024-03-01\t11:00:00:123\t 1000\t1a2c\tAgent\t*************\n",
+    "2024-03-01\t11:00:01:456\t 1000\t1a2c\tAgent\t  * WARNING: Exit code = 0x8024402C\n",
+]
+GENERIC = [
+    "2024-03-01 12:00:00 INFO Application started\n",
+    "2024-03-01 12:00:05 ERROR Connection timeout talking to api\n",
+]
+
+
+def parse_all(filename, lines):
+    fmt, parse = parsers.parser_for(filename, lines, LogAnalyzer())
+    return fmt, [parse(line) for line in lines]
+
+
+@pytest.mark.parametrize("filename, lines, expected", [
+    ("CBS.log", CBS, "cbs"),
+    ("dism.log", DISM, "dism"),
+    ("setupapi.dev.log", SETUPAPI, "setupapi"),
+    ("WindowsUpdate.log", WINDOWS_UPDATE, "windowsupdate"),
+    ("WindowsUpdate.log", WINDOWS_UPDATE_LEGACY, "windowsupdate"),
+    ("app.log", GENERIC, "generic"),
+    # Content decides when the file was renamed
+    ("bundle/0001.txt", CBS, "cbs"),
+    ("notes.txt", WINDOWS_UPDATE, "windowsupdate"),
+])
+def test_sniffs_format(filename, lines, expected):
+    assert parsers.sniff_format(filename, lines).name == expected
+
+
+def test_cbs_levels_and_failed_hresults():
+    _, events = parse_all("CBS.log", CBS)
+    assert events[0].timestamp == datetime(2024, 3, 1, 8, 0, 1)
+    assert [(e.level, e.category, e.severity) for e in events] == [
+        ("INFO", "Other", 1), ("INFO", "CBS", 3), ("ERROR", "CBS", 4)]
+
+
+def test_dism_errors():
+    _, events = parse_all("dism.log", DISM)
+    assert [(e.category, e.severity) for e in events] == [("Other", 1), ("DISM", 4)]
+
+
+def test_setupapi_body_lines_take_the_section_date():
+    _, events = parse_all("setupapi.dev.log", SETUPAPI)
+    failure = events[4]
+    assert failure.timestamp == datetime(2024, 3, 1, 10, 15, 31, 500000)
+    assert (failure.level, failure.category) == ("ERROR", "Installer")
+    assert events[6].level == "ERROR"
+    assert events[3].timestamp is None
+
+
+def test_windows_update_levels():
+    _, events = parse_all("WindowsUpdate.log", WINDOWS_UPDATE)
+    assert events[0].timestamp == datetime(2024, 3, 1, 11, 0, 0, 123456)
+    assert [e.level for e in events] == ["INFO", "WARNING", "ERROR"]
+    _, legacy = parse_all("WindowsUpdate.log", WINDOWS_UPDATE_LEGACY)
+    assert legacy[1].timestamp == datetime(2024, 3, 1, 11, 0, 1, 456000)
+    assert (legacy[1].level, legacy[1].category) == ("WARNING", "WindowsUpdate")
+
+
+@pytest.mark.parametrize("encoding, bom, expected", [
+    ("utf-8", codecs.BOM_UTF8, "utf-8-sig"),
+    ("utf-8", b"", "utf-8"),
+    ("utf-16-le", codecs.BOM_UTF16_LE, "utf-16"),
+    ("utf-16-be", codecs.BOM_UTF16_BE, "utf-16"),
+    ("utf-16-le", b"", "utf-16-le"),
+    ("utf-16-be", b"", "utf-16-be"),
+])
+def test_sniffs_encoding(encoding, bom, expected):
+    assert parsers.sniff_encoding(bom + "".join(CBS).encode(encoding)) == expected
+
+
+@pytest.mark.parametrize("encoding, bom", [
+    ("utf-16-le", codecs.BOM_UTF16_LE),
+    ("utf-16-le", b""),
+    ("utf-16-be", b""),
+    ("utf-8", codecs.BOM_UTF8),
+])
+def test_ingests_utf16_cbs_log(tmp_path, encoding, bom):
+    path = tmp_path / "CBS.log"
+    path.write_bytes(bom + "".join(CBS).encode(encoding))
+    [(fname, lines)] = ingestion.ingest(str(path))
+    assert lines == CBS
+    assert parsers.sniff_format(fname, lines).name == "cbs"
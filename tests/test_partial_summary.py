@@ -0,0 +1,99 @@
+"""
+Tests for partial_summary.py: merging shard partials in timeline order must give
+the single-pass LogAnalyzer.summary(), merging must be associative, and partials
+must survive a JSON round trip.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules import views
+from modules.analysis import LogAnalyzer, LogEvent
+from modules.partial_summary import PartialSummary, merge_partials
+
+START = datetime(2024, 3, 1, 8, 0, 0)
+
+
+def make_events(n=400, seed=7, start=START):
+    rng = random.Random(seed)
+    events, ts = [], start
+    for i in range(n):
+        # Mostly small steps, with cluster breaks, large gaps and untimestamped lines mixed in
+        ts += timedelta(seconds=rng.choice([0, 1, 2, 3, 8, 30, 400]))
+        stamped = rng.random() > 0.1
+        severity = rng.choice([1, 2, 4, 5])
+        events.append(LogEvent(ts if stamped else None, f"line {i}", None, f"cat{severity}", severity, None))
+    return events
+
+
+def comparable(summary):
+    return dict(summary, clusters=views.cluster_rows(summary["clusters"]))
+
+
+def single_pass(events):
+    summary = LogAnalyzer(list(events), ordered=True).summary()
+    return comparable(summary)
+
+
+def partial_of(events):
+    return LogAnalyzer(list(events), ordered=True).partial_summary()
+
+
+@pytest.mark.parametrize("cuts", [[200], [1, 2, 3], [57, 58, 190, 333], [0, 400]])
+def test_merged_shards_equal_single_pass(cuts):
+    events = make_events()
+    bounds = [0] + cuts + [len(events)]
+    shards = [events[a:b] for a, b in zip(bounds, bounds[1:])]
+    merged = merge_partials(partial_of(shard) for shard in shards).summary()
+    expected = single_pass(events)
+    assert comparable({k: merged[k] for k in expected}) == expected
+    assert merged["severity_histogram"] == dict(sorted(
+        (sev, sum(1 for e in events if e.severity == sev)) for sev in {e.severity for e in events}))
+
+
+def test_merge_is_associative():
+    events = make_events()
+    a, b, c = (partial_of(events[i:j]) for i, j in [(0, 120), (120, 121), (121, 400)])
+    left = a.merge(b).merge(c)
+    right = a.merge(b.merge(c))
+    assert left.to_dict() == right.to_dict()
+
+
+def test_json_round_trip_merges_the_same():
+    events = make_events()
+    a, b = partial_of(events[:150]), partial_of(events[150:])
+    shipped = [PartialSummary.from_dict(json.loads(json.dumps(p.to_dict()))) for p in (a, b)]
+    assert merge_partials(shipped).to_dict() == a.merge(b).to_dict()
+
+
+def test_partial_size_does_not_keep_event_timestamps():
+    # One cluster of many events stays one compact cluster
+    events = [LogEvent(START + timedelta(seconds=i), f"line {i}", None, "Other", 1, None) for i in range(1000)]
+    data = partial_of(events).to_dict()
+    assert data["clusters"] == [{"category": "Other", "count": 1000, "sample": "line 0",
+                                 "start": START.isoformat(), "end": (START + timedelta(seconds=999)).isoformat()}]
+
+
+def test_unordered_analyzer_matches_its_partial():
+    events = [LogEvent(START + timedelta(seconds=s), f"line {s}", None, "Other", 1, None) for s in (1000, 0, 500)]
+    analyzer = LogAnalyzer(events)
+    summary = analyzer.summary()
+    assert len(summary["anomalies"]) == 2
+    assert comparable(analyzer.partial_summary().summary())["anomalies"] == summary["anomalies"]
+
+
+def test_sorted_merge_of_separate_bundles():
+    first = make_events(seed=1)
+    second = make_events(seed=2, start=first[-1].timestamp + timedelta(hours=1))
+    first, second = [e for e in first if e.timestamp], [e for e in second if e.timestamp]
+    merged = merge_partials([partial_of(second), partial_of(first)], sort=True).summary()
+    expected = comparable(LogAnalyzer(second + first).summary())
+    assert comparable({k: merged[k] for k in expected}) == expected
+
+
+def test_sorted_merge_rejects_overlapping_bundles():
+    with pytest.raises(ValueError):
+        merge_partials([partial_of(make_events(seed=1)), partial_of(make_events(seed=2))], sort=True)